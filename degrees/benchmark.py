@@ -0,0 +1,232 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from loader import peak_memory
+
+# (compact, bidirectional) load and search settings for each mode
+MODES = {
+    "bfs": (False, False),
+    "bidirectional": (False, True),
+    "compact": (True, False),
+    "compact-bidirectional": (True, True)
+}
+
+SYLLABLES = [
+    "al", "an", "ar", "bel", "ca", "den", "el", "fa", "gor", "ha", "is",
+    "jo", "ka", "li", "ma", "na", "or", "pe", "ra", "sa", "ta", "ul",
+    "va", "wen", "ya", "zo"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic degrees data and benchmark searches."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser(
+        "generate", help="write synthetic people, movies and stars CSVs"
+    )
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--people", type=int, default=100000)
+    generate_parser.add_argument("--movies", type=int, default=50000)
+    generate_parser.add_argument("--cast-exponent", type=float, default=2.0,
+                                 help="Pareto exponent of cast sizes")
+    generate_parser.add_argument("--fame-exponent", type=float, default=0.8,
+                                 help="power-law exponent of how often "
+                                      "each person is cast")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser(
+        "run", help="time loading and a fixed query set in each mode"
+    )
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--queries", type=int, default=200)
+    run_parser.add_argument("--modes", nargs="+", choices=MODES,
+                            default=list(MODES))
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", action="store_true",
+                            help="print results as JSON lines")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        start = time.perf_counter()
+        rows = generate(args.directory, args.people, args.movies,
+                        args.cast_exponent, args.fame_exponent, args.seed)
+        print(f"Wrote {rows} star rows to {args.directory} "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        queries = query_set(args.directory, args.queries, args.seed)
+        for mode in args.modes:
+            result = benchmark(args.directory, mode, queries)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print_result(result)
+
+
+def generate(directory, num_people, num_movies,
+             cast_exponent=2.0, fame_exponent=0.8, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with IMDb-shaped data to
+    `directory`: cast sizes follow a Pareto distribution and a few people
+    appear in far more movies than most. Returns the number of star rows.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i + 1, random_name(rng), rng.randint(1900, 2010)])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i + 1, f"Movie {i + 1}", rng.randint(1920, 2024)])
+
+    # Shuffle which ids are famous so fame is not tied to id order
+    fame = list(range(1, num_people + 1))
+    rng.shuffle(fame)
+
+    rows = 0
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in range(1, num_movies + 1):
+            size = min(num_people, int(rng.paretovariate(cast_exponent)))
+            cast = set()
+            while len(cast) < size:
+                cast.add(fame[power_law_index(rng, num_people, fame_exponent)])
+            for person_id in cast:
+                writer.writerow([person_id, movie_id])
+            rows += len(cast)
+    return rows
+
+
+def power_law_index(rng, n, exponent):
+    """
+    Returns an index below `n` drawn with probability roughly
+    proportional to (index + 1) ** -exponent.
+    """
+    u = rng.random()
+    if exponent == 1:
+        x = n ** u
+    else:
+        power = 1 - exponent
+        x = ((n ** power - 1) * u + 1) ** (1 / power)
+    return min(n - 1, int(x) - 1)
+
+
+def random_name(rng):
+    """
+    Returns a random two-word name built from syllables.
+    """
+    return " ".join(
+        "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize()
+        for _ in range(2)
+    )
+
+
+def query_set(directory, count, seed=0):
+    """
+    Returns `count` (source, target) person id pairs, chosen reproducibly
+    from the people who starred in at least one movie.
+    """
+    with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        cast = sorted({row[0] for row in reader})
+    rng = random.Random(seed)
+    return [tuple(rng.sample(cast, 2)) for _ in range(count)]
+
+
+def benchmark(directory, mode, queries):
+    """
+    Runs `run_mode` in a fresh process so that load time and peak memory
+    are measured for that mode alone.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_mode, directory, mode, queries).result()
+
+
+def run_mode(directory, mode, queries):
+    """
+    Loads `directory` and answers every query in `mode`, returning load
+    time, query latency percentiles, people explored and peak memory.
+    """
+    compact, bidirectional = MODES[mode]
+    start = time.perf_counter()
+    degrees.load_data(directory, compact, cache=False)
+    load_seconds = time.perf_counter() - start
+
+    search = (degrees.bidirectional_shortest_path if bidirectional
+              else degrees.shortest_path)
+    latencies = []
+    explored = []
+    connected = 0
+    for source, target in queries:
+        stats = {}
+        start = time.perf_counter()
+        path = search(source, target, stats)
+        latencies.append(time.perf_counter() - start)
+        explored.append(stats["explored"])
+        connected += path is not None
+
+    return {
+        "mode": mode,
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "queries": len(queries),
+        "connected": connected,
+        "load_seconds": load_seconds,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies, default=0),
+        "explored_mean": sum(explored) / len(explored) if explored else 0,
+        "peak_memory": peak_memory()
+    }
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of `values` by the nearest-rank method.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def print_result(result):
+    memory = result["peak_memory"]
+    memory = "unknown" if memory is None else f"{memory / 2 ** 20:.0f} MiB"
+    print(f"{result['mode']}:")
+    print(f"  Loaded {result['people']} people and {result['movies']} "
+          f"movies in {result['load_seconds']:.2f}s")
+    print(f"  {result['queries']} queries, {result['connected']} connected")
+    print(f"  Latency p50 {result['latency_p50'] * 1000:.2f} ms, "
+          f"p90 {result['latency_p90'] * 1000:.2f} ms, "
+          f"p99 {result['latency_p99'] * 1000:.2f} ms, "
+          f"max {result['latency_max'] * 1000:.2f} ms")
+    print(f"  Explored {result['explored_mean']:.0f} people per query")
+    print(f"  Peak memory {memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
-import csv
+import argparse
+import io
+import json
+import multiprocessing
+import os
 import sys
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import ParentTree
+from loader import load_csv, peak_memory
+from nameindex import POLICIES, NameIndex
+from snapshot import load_snapshot, source_stamps, write_snapshot
+from util import (
+    MISS, Node, PathCache, QueueFrontier, StackFrontier, path_from_parents
+)
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,55 +26,156 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed co-star graph, used instead of the sets in `people`
+# and `movies` when data is loaded with `compact=True`
+graph = None
 
-def load_data(directory):
+# PathCache consulted by `find_path`, if caching is enabled
+cache = None
+
+# NameIndex over `names`, built on first use by `get_name_index`
+name_index = None
+
+# Policy `resolve_person` uses to pick among people sharing a name,
+# one of "movies", "oldest" or "youngest"; None reports the ambiguity
+disambiguate = None
+
+
+def load_data(directory, compact=False, cache=True,
+              years=None, min_cast=None, birth=True):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, the person-movie links are stored only in
+    a `CompactGraph` rather than as sets in `people` and `movies`.
+    Compact data is then also reused from a binary snapshot next to the
+    CSV files when they are unchanged, or written to one after parsing,
+    unless `cache` is false. A snapshot is memory-mapped rather than
+    read: `names`, `people` and `movies` become read-only mappings over
+    it that look ids up by bisection and build entries on access.
+
+    Movies can be limited to an inclusive (first, last) range of `years`
+    or to those with at least `min_cast` stars, and birth years dropped
+    with `birth=False`; such partial loads bypass the snapshot.
+    Returns a dictionary of load statistics.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+    global names, people, movies, graph, name_index
+    graph = None
+    name_index = None
+    cache = cache and years is None and not min_cast and birth
+
+    if compact and cache:
+        start = time.perf_counter()
+        snapshot = load_snapshot(directory)
+        if snapshot is not None:
+            names, people, movies, graph = snapshot
+            return {
+                "snapshot": True,
+                "seconds": time.perf_counter() - start,
+                "peak_memory": peak_memory()
             }
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    names, people, movies = {}, {}, {}
+    stamps = source_stamps(directory) if compact and cache else None
+    graph, stats = load_csv(
+        directory, names, people, movies, compact, years, min_cast, birth
+    )
+    if compact and cache:
+        write_snapshot(directory, names, people, movies, graph, stamps)
+    return stats
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the co-star graph as integer arrays "
+                             "(the default unless --no-cache is given)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the compact snapshot")
+    parser.add_argument("--cache", metavar="SIZE", type=int, default=0,
+                        help="cache up to SIZE paths for --batch and --serve")
+    parser.add_argument("--cache-ttl", metavar="SECONDS", type=float,
+                        help="expire cached paths after SECONDS")
+    parser.add_argument("--cache-trees", metavar="N", type=int, default=8,
+                        help="also cache the whole search trees of up to N "
+                             "frequent sources (default 8, 0 for none)")
+    parser.add_argument("--tree-after", metavar="N", type=int, default=2,
+                        help="cache a source's search tree from its Nth "
+                             "query (default 2)")
+    parser.add_argument("--years", metavar="FIRST-LAST",
+                        help="only load movies released in these years")
+    parser.add_argument("--min-cast", metavar="N", type=int,
+                        help="only link movies with at least N stars")
+    parser.add_argument("--no-birth", action="store_true",
+                        help="do not keep people's birth years")
+    parser.add_argument("--load-stats", action="store_true",
+                        help="report load time, rows per second and "
+                             "peak memory")
+    parser.add_argument("--disambiguate", choices=POLICIES,
+                        help="pick among people sharing a name by most "
+                             "movies or birth year instead of reporting it")
+    parser.add_argument("--processes", metavar="N", type=int, default=1,
+                        help="answer --batch queries in N processes "
+                             "(0 for one per CPU)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer JSON lines queries from FILE ('-' for stdin)")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer queries over HTTP on localhost:PORT")
+    mode.add_argument("--distances", metavar="NAME",
+                      help="print the distance histogram from NAME and "
+                           "the connected component sizes")
+    args = parser.parse_args()
+    years = None
+    if args.years:
+        try:
+            first, last = args.years.split("-")
+            years = (int(first), int(last))
+        except ValueError:
+            parser.error("--years must look like 1990-1999")
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=sys.stderr if args.batch else sys.stdout)
+    stats = load_data(args.directory, args.compact or not args.no_cache,
+                      not args.no_cache,
+                      years, args.min_cast, not args.no_birth)
+    print("Data loaded.", file=sys.stderr if args.batch else sys.stdout)
+    if args.load_stats:
+        print(f"Load: {json.dumps(stats)}", file=sys.stderr)
+
+    global cache, disambiguate
+    disambiguate = args.disambiguate
+    if args.cache:
+        cache = PathCache(args.cache, args.cache_ttl,
+                          args.cache_trees, args.tree_after)
+
+    processes = args.processes or None
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.bidirectional, processes)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.bidirectional, processes)
+        if cache is not None and processes == 1:
+            print(f"Cache: {json.dumps(cache.info())}", file=sys.stderr)
+        return
+    elif args.serve:
+        serve(args.serve, args.bidirectional)
+        return
+    elif args.distances:
+        source = resolve_person(args.distances)
+        if source is None:
+            sys.exit("Person not found.")
+        if isinstance(source, list):
+            sys.exit(f"Ambiguous name: {args.distances} (candidates: "
+                     f"{', '.join(source)}); use an id or --disambiguate")
+        print_distances(source)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +184,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.bidirectional:
+        path = bidirectional_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -84,8 +202,262 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
-   
+def answer_query(source, target, bidirectional=False):
+    """
+    Returns a JSON-serializable dictionary answering a query between two
+    people, each given by name or IMDb id: the path as a list of
+    movie/person steps, its number of degrees (None if not connected)
+    and how many people the search explored. Unknown or ambiguous
+    people are reported under "error" instead.
+    """
+    result = {"source": source, "target": target}
+    source_id = resolve_person(source)
+    target_id = resolve_person(target)
+    for name, person_id in ((source, source_id), (target, target_id)):
+        if person_id is None:
+            result["error"] = f"Person not found: {name}"
+            result["suggestions"] = [
+                people[candidate]["name"]
+                for candidate in get_name_index().lookup(name, 5)
+            ]
+            return result
+        if isinstance(person_id, list):
+            result["error"] = f"Ambiguous name: {name}"
+            result["candidates"] = person_id
+            return result
+
+    stats = {}
+    path = find_path(source_id, target_id, bidirectional, stats)
+
+    result["source_id"] = source_id
+    result["target_id"] = target_id
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = None if path is None else [
+        {
+            "movie_id": movie_id,
+            "movie": movies[movie_id]["title"],
+            "person_id": person_id,
+            "person": people[person_id]["name"]
+        }
+        for movie_id, person_id in path
+    ]
+    result["explored"] = stats.get("explored", 0)
+    if cache is not None:
+        result["cached"] = stats.get("cached", False)
+    return result
+
+
+def find_path(source, target, bidirectional=False, stats=None):
+    """
+    Returns the shortest path from `source` to `target` like
+    `shortest_path`, answering from `cache` when possible.
+
+    A source searched from repeatedly gets its whole breadth-first
+    tree computed once and cached, to answer its later targets.
+    """
+    if stats is None:
+        stats = {}
+    search = bidirectional_shortest_path if bidirectional else shortest_path
+    if cache is None:
+        return search(source, target, stats)
+
+    path = cache.get(source, target)
+    if path is not MISS:
+        stats["explored"] = 0
+        stats["cached"] = True
+        return path
+
+    if cache.wants_tree(source):
+        parents = parent_tree(source, stats)
+        cache.put_tree(source, parents)
+        path = path_from_parents(parents, target)
+    else:
+        path = search(source, target, stats)
+    cache.put(source, target, path)
+    return path
+
+
+def parse_query(line):
+    """
+    Returns the (source, target) pair of a JSON query line, given either
+    as an object with "source" and "target" keys or as a two-item list.
+    """
+    query = json.loads(line)
+    if isinstance(query, dict):
+        return query["source"], query["target"]
+    source, target = query
+    return source, target
+
+
+def answer_pair(pair, bidirectional=False):
+    """
+    Returns `answer_query` for a (source, target) pair.
+    """
+    return answer_query(pair[0], pair[1], bidirectional)
+
+
+def answer_queries(pairs, bidirectional=False, processes=None):
+    """
+    Yields `answer_query` results for a list of (source, target) pairs,
+    in order, spread across `processes` worker processes (one per CPU
+    if None).
+
+    Workers are forked after the data is loaded, so they share it with
+    this process instead of receiving a pickled copy per task. Where
+    fork is unavailable the pairs are answered in this process.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for pair in pairs:
+            yield answer_pair(pair, bidirectional)
+        return
+
+    # Build the name index used for suggestions before forking, so the
+    # workers share one copy instead of each building their own
+    get_name_index().build()
+    chunksize = max(1, len(pairs) // (processes * 4))
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        yield from pool.imap(
+            partial(answer_pair, bidirectional=bidirectional),
+            pairs, chunksize
+        )
+
+
+def read_query(line):
+    """
+    Returns the (source, target) pair of a query line, or an error
+    result dictionary if the line is not a valid query.
+    """
+    try:
+        return parse_query(line)
+    except (ValueError, KeyError, TypeError):
+        return {"error": f"Invalid query: {line.strip()}"}
+
+
+def run_batch(lines, out, bidirectional=False, processes=1):
+    """
+    Answers every JSON query in `lines`, writing one JSON result per line
+    to `out` in the same order. With more than one process, all of the
+    queries are read first and answered in parallel by `answer_queries`.
+    """
+    queries = (read_query(line) for line in lines if line.strip())
+    if processes == 1:
+        results = (
+            query if isinstance(query, dict)
+            else answer_pair(query, bidirectional)
+            for query in queries
+        )
+    else:
+        queries = list(queries)
+        answers = answer_queries(
+            [query for query in queries if not isinstance(query, dict)],
+            bidirectional, processes
+        )
+        results = (
+            query if isinstance(query, dict) else next(answers)
+            for query in queries
+        )
+
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+
+
+def serve(port, bidirectional=False):
+    """
+    Answers queries over HTTP on localhost until interrupted, keeping the
+    loaded data resident. GET /?source=...&target=... answers one query;
+    POST / with a body of JSON query lines answers each of them.
+    GET /cache reports the path cache's hit and miss counts, and
+    GET /names?name=... returns ranked candidates for a name.
+    """
+
+    class QueryHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/cache":
+                self.respond(200, cache.info() if cache is not None else {})
+                return
+            if url.path == "/names":
+                params = parse_qs(url.query)
+                if "name" not in params:
+                    self.respond(400, {"error": "name is required"})
+                    return
+                try:
+                    limit = int(params.get("limit", [10])[0])
+                except ValueError:
+                    limit = 0
+                if limit < 1:
+                    self.respond(400, {
+                        "error": "limit must be a positive integer"
+                    })
+                    return
+                self.respond(200, [
+                    {
+                        "id": person_id,
+                        "name": people[person_id]["name"],
+                        "birth": people[person_id].get("birth", ""),
+                        "movies": movie_count(person_id)
+                    }
+                    for person_id in get_name_index().lookup(
+                        params["name"][0], limit, disambiguate or "movies"
+                    )
+                ])
+                return
+            params = parse_qs(url.query)
+            if "source" not in params or "target" not in params:
+                self.respond(400, {"error": "source and target are required"})
+                return
+            self.respond(200, answer_query(
+                params["source"][0], params["target"][0], bidirectional
+            ))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            out = io.StringIO()
+            run_batch(body.splitlines(), out, bidirectional)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            self.wfile.write(out.getvalue().encode("utf-8"))
+
+        def respond(self, status, result):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(result).encode("utf-8"))
+
+    # Index names up front so the first /names query does not stall
+    get_name_index().build()
+    server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+    print(f"Serving on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def shortest_path(source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None. If `stats` is given, the
+        number of people explored is stored in it under "explored".
+        """
+        if graph is not None:
+            return graph.shortest_path(source, target, stats)
+        if stats is None:
+            stats = {}
+        stats["explored"] = 0
+        if source == target:
+            return []
+
         start = Node(state = source, parent=None, action=None)
         frontier = QueueFrontier()
         frontier.add(start)
@@ -96,10 +468,11 @@ def shortest_path(source, target):
         while True:
 
             if frontier.empty():
-                raise Exception("no solution")
+                return None
 
             node = frontier.remove()
             num_explored += 1
+            stats["explored"] = num_explored
 
 
             explored.add(node.state)
@@ -126,12 +499,221 @@ def shortest_path(source, target):
                     frontier.add(child)
 
 
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outward
+    from both people at once until the two searches meet.
+
+    If no possible path, returns None. If `stats` is given, the
+    number of people explored is stored in it under "explored".
+    """
+    if graph is not None:
+        return graph.bidirectional_shortest_path(source, target, stats)
+    if stats is None:
+        stats = {}
+    stats["explored"] = 0
+    if source == target:
+        return []
+
+    # Maps each reached person to (movie_id, person_id) of the step
+    # back towards the side's starting person, or None for the start
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand one whole level of the smaller frontier so that the
+        # first meeting found is guaranteed to be a shortest one
+        if len(forward_frontier) <= len(backward_frontier):
+            stats["explored"] += len(forward_frontier)
+            forward_frontier, meet = expand_level(
+                forward_frontier, forward, backward
+            )
+        else:
+            stats["explored"] += len(backward_frontier)
+            backward_frontier, meet = expand_level(
+                backward_frontier, backward, forward
+            )
+        if meet is not None:
+            return join_paths(meet, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, parents, other_parents):
+    """
+    Expands every person in `frontier` by one step, recording parents.
+    Returns the next frontier and the meeting person closest to the
+    other side's start, or None if the two searches have not met.
+    """
+    next_frontier = []
+    meet = None
+    meet_depth = None
+    for person_id in frontier:
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            next_frontier.append(neighbor_id)
+            if neighbor_id in other_parents:
+                depth = path_depth(neighbor_id, other_parents)
+                if meet_depth is None or depth < meet_depth:
+                    meet, meet_depth = neighbor_id, depth
+    return next_frontier, meet
+
+
+def path_depth(person_id, parents):
+    """
+    Returns the number of steps from `person_id` back to its search start.
+    """
+    depth = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        depth += 1
+    return depth
+
+
+def join_paths(meet, forward, backward):
+    """
+    Joins the forward and backward parent chains at `meet` into a single
+    list of (movie_id, person_id) pairs from source to target.
+    """
+    path = []
+    person_id = meet
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    person_id = meet
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
+
+
+
+def all_distances(source):
+    """
+    Runs a single breadth-first search from `source` and returns two
+    dictionaries covering every reachable person: their degrees of
+    separation from the source, and the (movie_id, person_id) step back
+    towards the source that reached them (None for the source itself).
+    """
+    if graph is not None:
+        distance, parent_person, parent_movie = graph.bfs(source)
+        distances = {}
+        parents = {}
+        for person, degrees in enumerate(distance):
+            if degrees == -1:
+                continue
+            person_id = graph.person_ids[person]
+            distances[person_id] = degrees
+            parents[person_id] = None if degrees == 0 else (
+                graph.movie_ids[parent_movie[person]],
+                graph.person_ids[parent_person[person]]
+            )
+        return distances, parents
+
+    distances = {source: 0}
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id not in distances:
+                    distances[neighbor_id] = distances[person_id] + 1
+                    parents[neighbor_id] = (movie_id, person_id)
+                    next_frontier.append(neighbor_id)
+        frontier = next_frontier
+    return distances, parents
+
+
+def parent_tree(source, stats):
+    """
+    Runs a single breadth-first search from `source` and returns the
+    parents of every reachable person for `path_from_parents`: the
+    search's index arrays as a `ParentTree` for the compact graph, or
+    the parents dictionary of `all_distances` otherwise. The number of
+    people reached is stored in `stats` under "explored".
+    """
+    if graph is not None:
+        distance, parent_person, parent_movie = graph.bfs(source)
+        stats["explored"] = len(distance) - distance.count(-1)
+        return ParentTree(graph, parent_person, parent_movie)
+
+    distances, parents = all_distances(source)
+    stats["explored"] = len(distances)
+    return parents
+
+
+def distance_histogram(distances):
+    """
+    Returns a dictionary mapping each degree of separation in
+    `distances` to the number of people at that degree.
+    """
+    histogram = {}
+    for degrees in distances.values():
+        histogram[degrees] = histogram.get(degrees, 0) + 1
+    return dict(sorted(histogram.items()))
+
+
+def component_sizes():
+    """
+    Returns the number of people in each connected component of the
+    co-star graph, largest first.
+    """
+    if graph is not None:
+        return graph.component_sizes()
+
+    seen = set()
+    sizes = []
+    for person_id in people:
+        if person_id not in seen:
+            distances, _ = all_distances(person_id)
+            seen.update(distances)
+            sizes.append(len(distances))
+    sizes.sort(reverse=True)
+    return sizes
+
+
+def print_distances(source):
+    """
+    Prints how many people are at each degree of separation from
+    `source`, followed by the sizes of the graph's connected components.
+    """
+    distances, _ = all_distances(source)
+    name = people[source]["name"]
+    print(f"Degrees of separation from {name}:")
+    for degrees, count in distance_histogram(distances).items():
+        print(f"  {degrees}: {count}")
+    print(f"  Not connected: {len(people) - len(distances)}")
+
+    sizes = component_sizes()
+    print(f"Connected components: {len(sizes)}")
+    counts = {}
+    for size in sizes:
+        counts[size] = counts.get(size, 0) + 1
+    for size, count in counts.items():
+        print(f"  {count} of size {size}")
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.Ke
+
+    With a `disambiguate` policy, ambiguous names are resolved by it
+    through `resolve_person` instead of asking.
     """
+    if disambiguate is not None:
+        return resolve_person(name)
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
@@ -140,7 +722,7 @@ def person_id_for_name(name):
         for person_id in person_ids:
             person = people[person_id]
             name = person["name"]
-            birth = person["birth"]
+            birth = person.get("birth", "")
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -153,11 +735,53 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def resolve_person(name):
+    """
+    Returns the IMDB id for a person's name or id without prompting:
+    None if nobody matches. If the name is ambiguous, returns the id
+    chosen by the `disambiguate` policy, or a list of the candidate ids
+    if there is no policy.
+    """
+    if name in people:
+        return name
+    if disambiguate is not None:
+        return get_name_index().resolve(name, disambiguate)
+    person_ids = sorted(get_name_index().exact(name))
+    if len(person_ids) == 0:
+        return None
+    elif len(person_ids) > 1:
+        return person_ids
+    else:
+        return person_ids[0]
+
+
+def get_name_index():
+    """
+    Returns the NameIndex over the loaded names, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names, people, movie_count)
+    return name_index
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return graph.person_offsets[person + 1] - graph.person_offsets[person]
+    return len(people[person_id]["movies"])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,434 @@
+from array import array
+
+# Most released search arrays kept for reuse by `CompactGraph.unvisited`
+SCRATCH_ARRAYS = 16
+
+
+class CompactGraph():
+    """
+    Bipartite person-movie graph with IMDb ids interned to dense integers.
+
+    Adjacency is stored CSR-style: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+    `person_index` and `movie_index` map ids back to integers, and are
+    built as dictionaries unless mappings are given.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {pid: i for i, pid in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.scratch = []
+        self.cleared = None
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edges):
+        """
+        Builds a graph from lists of person and movie ids and an iterable
+        of (person_id, movie_id) star pairs. Pairs naming an unknown
+        person or movie are skipped.
+        """
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, movie_id in edges:
+            try:
+                person = person_index[person_id]
+                movie = movie_index[movie_id]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+        return cls.from_index_edges(
+            person_ids, movie_ids, edge_people, edge_movies
+        )
+
+    @classmethod
+    def from_index_edges(cls, person_ids, movie_ids, edge_people, edge_movies):
+        """
+        Builds a graph from lists of person and movie ids and parallel
+        arrays holding the person and movie index of each star link.
+        """
+        person_offsets, person_movies = csr(
+            len(person_ids), edge_people, edge_movies
+        )
+        movie_offsets, movie_people = csr(
+            len(movie_ids), edge_movies, edge_people
+        )
+        return cls(list(person_ids), list(movie_ids),
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds a graph from `people` and `movies` dictionaries in the
+        format produced by `degrees.load_data`.
+        """
+        edges = (
+            (person_id, movie_id)
+            for person_id, person in people.items()
+            for movie_id in person["movies"]
+        )
+        return cls.from_edges(list(people), list(movies), edges)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indexes of person index `person`.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes of movie index `movie`.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with person index `person`.
+        """
+        for movie in self.movies_of(person):
+            for costar in self.stars_of(movie):
+                yield movie, costar
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[costar])
+            for movie, costar in self.neighbors(self.person_index[person_id])
+        }
+
+    def unvisited(self):
+        """
+        Returns an array holding -1 for every person index, reusing one
+        given back with `release` when there is one: new arrays this
+        large are slow to fault in when the heap is small, as it is
+        after loading a snapshot.
+        """
+        try:
+            parents = self.scratch.pop()
+        except IndexError:
+            return array("i", [-1]) * len(self.person_ids)
+        if self.cleared is None:
+            self.cleared = array("i", [-1]) * len(self.person_ids)
+        parents[:] = self.cleared
+        return parents
+
+    def release(self, *arrays):
+        """
+        Gives arrays from `unvisited` that are no longer used back for
+        reuse, keeping at most SCRATCH_ARRAYS of them.
+        """
+        for parents in arrays:
+            if len(self.scratch) < SCRATCH_ARRAYS:
+                self.scratch.append(parents)
+
+    def shortest_path(self, source_id, target_id, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None. If `stats` is given, the
+        number of people explored is stored in it under "explored".
+        """
+        if stats is None:
+            stats = {}
+        stats["explored"] = 0
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        if source == target:
+            return []
+
+        parent_person = self.unvisited()
+        parent_movie = self.unvisited()
+        try:
+            return self.search(source, target, parent_person, parent_movie, stats)
+        finally:
+            self.release(parent_person, parent_movie)
+
+    def search(self, source, target, parent_person, parent_movie, stats):
+        """
+        Breadth-first search from person index `source` for `target`,
+        filling the unvisited arrays `parent_person` and `parent_movie`,
+        for `shortest_path`.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        expanded_movies = bytearray(len(self.movie_ids))
+        parent_person[source] = source
+        queue = array("i", [source])
+
+        head = 0
+        while head < len(queue):
+            person = queue[head]
+            head += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+
+                # A movie's stars are all reached the first time it is seen
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    costar = movie_people[j]
+                    if parent_person[costar] != -1:
+                        continue
+                    parent_person[costar] = person
+                    parent_movie[costar] = movie
+                    if costar == target:
+                        stats["explored"] = head
+                        return self.path_to(target, parent_person, parent_movie)
+                    queue.append(costar)
+
+        stats["explored"] = head
+        return None
+
+    def bidirectional_shortest_path(self, source_id, target_id, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching outward
+        from both people at once until the two searches meet.
+
+        If no possible path, returns None. If `stats` is given, the
+        number of people explored is stored in it under "explored".
+        """
+        if stats is None:
+            stats = {}
+        stats["explored"] = 0
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        if source == target:
+            return []
+
+        forward = (self.unvisited(), self.unvisited())
+        backward = (self.unvisited(), self.unvisited())
+        try:
+            return self.meet(source, target, forward, backward, stats)
+        finally:
+            self.release(*forward, *backward)
+
+    def meet(self, source, target, forward, backward, stats):
+        """
+        Searches from person indexes `source` and `target` in turn until
+        the searches meet, filling the unvisited (parent person, parent
+        movie) arrays `forward` and `backward`, for
+        `bidirectional_shortest_path`.
+        """
+        forward[0][source] = source
+        backward[0][target] = target
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                stats["explored"] += len(forward_frontier)
+                forward_frontier, meet = self.expand_level(
+                    forward_frontier, forward, backward
+                )
+            else:
+                stats["explored"] += len(backward_frontier)
+                backward_frontier, meet = self.expand_level(
+                    backward_frontier, backward, forward
+                )
+            if meet is not None:
+                path = self.path_to(meet, *forward)
+                person = meet
+                parent_person, parent_movie = backward
+                while parent_person[person] != person:
+                    movie = parent_movie[person]
+                    person = parent_person[person]
+                    path.append((self.movie_ids[movie], self.person_ids[person]))
+                return path
+
+        return None
+
+    def expand_level(self, frontier, parents, other_parents):
+        """
+        Expands every person index in `frontier` by one step. Returns the
+        next frontier and the meeting person closest to the other side's
+        start, or None if the two searches have not met.
+        """
+        parent_person, parent_movie = parents
+        other_parent_person = other_parents[0]
+        next_frontier = []
+        meet = None
+        meet_depth = None
+        for person in frontier:
+            for movie, costar in self.neighbors(person):
+                if parent_person[costar] != -1:
+                    continue
+                parent_person[costar] = person
+                parent_movie[costar] = movie
+                next_frontier.append(costar)
+                if other_parent_person[costar] != -1:
+                    depth = 0
+                    node = costar
+                    while other_parent_person[node] != node:
+                        node = other_parent_person[node]
+                        depth += 1
+                    if meet_depth is None or depth < meet_depth:
+                        meet, meet_depth = costar, depth
+        return next_frontier, meet
+
+    def bfs(self, source_id):
+        """
+        Runs a breadth-first search from `source_id` over the whole graph.
+        Returns arrays of distance, parent person and parent movie indexes
+        for every person index, with -1 for people who cannot be reached.
+        The source is its own parent.
+        """
+        source = self.person_index[source_id]
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        distance = array("i", [-1]) * len(self.person_ids)
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        expanded_movies = bytearray(len(self.movie_ids))
+        distance[source] = 0
+        parent_person[source] = source
+        queue = array("i", [source])
+
+        head = 0
+        while head < len(queue):
+            person = queue[head]
+            head += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    costar = movie_people[j]
+                    if parent_person[costar] != -1:
+                        continue
+                    distance[costar] = distance[person] + 1
+                    parent_person[costar] = person
+                    parent_movie[costar] = movie
+                    queue.append(costar)
+
+        return distance, parent_person, parent_movie
+
+    def component_sizes(self):
+        """
+        Returns the number of people in each connected component,
+        largest first.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # Each movie lies in exactly one component, so these flags can be
+        # shared by the searches from every component's first person
+        seen = bytearray(len(self.person_ids))
+        expanded_movies = bytearray(len(self.movie_ids))
+        sizes = []
+        for start in range(len(self.person_ids)):
+            if seen[start]:
+                continue
+            seen[start] = 1
+            stack = [start]
+            size = 0
+            while stack:
+                person = stack.pop()
+                size += 1
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if expanded_movies[movie]:
+                        continue
+                    expanded_movies[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        costar = movie_people[j]
+                        if not seen[costar]:
+                            seen[costar] = 1
+                            stack.append(costar)
+            sizes.append(size)
+
+        sizes.sort(reverse=True)
+        return sizes
+
+    def path_to(self, person, parent_person, parent_movie):
+        """
+        Follows parent pointers from person index `person` back to the
+        search start, returning (movie_id, person_id) pairs from the start.
+        """
+        path = []
+        while parent_person[person] != person:
+            path.append(
+                (self.movie_ids[parent_movie[person]], self.person_ids[person])
+            )
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+
+class ParentTree():
+    """
+    Parent person and parent movie arrays of a breadth-first search
+    over a CompactGraph, as returned by `CompactGraph.bfs`, answering
+    the path from the search start to any person it reached.
+    """
+
+    def __init__(self, graph, parent_person, parent_movie):
+        self.graph = graph
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+
+    def path_to(self, target_id):
+        """
+        Returns the list of (movie_id, person_id) pairs leading from the
+        search start to `target_id`, or None if it was not reached.
+        """
+        target = self.graph.person_index.get(target_id)
+        if target is None or self.parent_person[target] == -1:
+            return None
+        return self.graph.path_to(target, self.parent_person, self.parent_movie)
+
+
+def csr(size, rows, columns):
+    """
+    Groups `columns` by their entry in `rows`, returning an offsets array
+    of length `size + 1` and the grouped column values.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array("i", [0]) * len(columns)
+    position = offsets[:-1]
+    for row, column in zip(rows, columns):
+        values[position[row]] = column
+        position[row] += 1
+    return offsets, values
@@ -0,0 +1,133 @@
+import csv
+import sys
+import time
+from array import array
+from operator import itemgetter
+
+from graph import CompactGraph
+
+
+def read_columns(path, columns):
+    """
+    Yields a tuple of the values of `columns`, in that order, for each
+    row of the CSV file at `path`, without building a dict per row.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        getter = itemgetter(*(header.index(column) for column in columns))
+        for row in reader:
+            if len(columns) == 1:
+                yield (getter(row),)
+            else:
+                yield getter(row)
+
+
+def load_csv(directory, names, people, movies, compact=False,
+             years=None, min_cast=None, birth=True):
+    """
+    Streams the CSV files in `directory` into `names`, `people` and
+    `movies`, reading only the columns that are kept.
+
+    Movies outside the inclusive (first, last) `years` range are skipped,
+    as are the star links of movies with fewer than `min_cast` stars.
+    Birth years are dropped if `birth` is false.
+
+    If `compact` is true, links are returned in a `CompactGraph` instead
+    of being added as sets to `people` and `movies`. Returns the graph
+    (None if not compact) and a dictionary of load statistics.
+    """
+    start = time.perf_counter()
+    stats = {"people": 0, "movies": 0, "stars": 0}
+
+    # Load people, sharing one string object per id across the data
+    columns = ("id", "name", "birth") if birth else ("id", "name")
+    for row in read_columns(f"{directory}/people.csv", columns):
+        stats["people"] += 1
+        person_id = sys.intern(row[0])
+        people[person_id] = {"name": row[1]}
+        if birth:
+            people[person_id]["birth"] = row[2]
+        if not compact:
+            people[person_id]["movies"] = set()
+        key = row[1].lower()
+        if key not in names:
+            names[key] = {person_id}
+        else:
+            names[key].add(person_id)
+
+    # Load movies
+    for movie_id, title, year in read_columns(
+        f"{directory}/movies.csv", ("id", "title", "year")
+    ):
+        stats["movies"] += 1
+        if years is not None and not (
+            year.isdigit() and years[0] <= int(year) <= years[1]
+        ):
+            continue
+        movie_id = sys.intern(movie_id)
+        movies[movie_id] = {"title": title, "year": year}
+        if not compact:
+            movies[movie_id]["stars"] = set()
+
+    # Load stars as integer edges, dropping links to unknown people
+    # and to movies that were filtered out
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    edge_people = array("i")
+    edge_movies = array("i")
+    for person_id, movie_id in read_columns(
+        f"{directory}/stars.csv", ("person_id", "movie_id")
+    ):
+        stats["stars"] += 1
+        person = person_index.get(person_id)
+        movie = movie_index.get(movie_id)
+        if person is not None and movie is not None:
+            edge_people.append(person)
+            edge_movies.append(movie)
+    del person_index, movie_index
+
+    if min_cast:
+        cast = array("i", [0]) * len(movie_ids)
+        for movie in edge_movies:
+            cast[movie] += 1
+        kept_people = array("i")
+        kept_movies = array("i")
+        for person, movie in zip(edge_people, edge_movies):
+            if cast[movie] >= min_cast:
+                kept_people.append(person)
+                kept_movies.append(movie)
+        edge_people, edge_movies = kept_people, kept_movies
+        del cast
+
+    graph = None
+    if compact:
+        graph = CompactGraph.from_index_edges(
+            person_ids, movie_ids, edge_people, edge_movies
+        )
+    else:
+        for person, movie in zip(edge_people, edge_movies):
+            people[person_ids[person]]["movies"].add(movie_ids[movie])
+            movies[movie_ids[movie]]["stars"].add(person_ids[person])
+
+    stats["links"] = len(edge_people)
+    stats["seconds"] = time.perf_counter() - start
+    rows = stats["people"] + stats["movies"] + stats["stars"]
+    stats["rows_per_second"] = rows / stats["seconds"] if stats["seconds"] else None
+    stats["peak_memory"] = peak_memory()
+    return graph, stats
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in bytes, or None
+    on platforms where it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
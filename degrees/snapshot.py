@@ -0,0 +1,322 @@
+import bisect
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+from graph import CompactGraph
+
+SNAPSHOT = "degrees.snapshot"
+MAGIC = b"DEGSNAP2"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def source_stamps(directory):
+    """
+    Returns the (size, mtime) of each CSV file the snapshot is built from.
+    """
+    stamps = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def encode_strings(strings):
+    """
+    Returns the UTF-8 encodings of `strings` joined into one bytes blob,
+    and an array of the offset where each one starts, plus the end.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return b"".join(encoded), offsets
+
+
+def write_snapshot(directory, names, people, movies, graph, stamps):
+    """
+    Writes `names`, `people`, `movies` and the arrays of `graph` to a
+    snapshot file in `directory`. Everything is stored as flat arrays,
+    strings as UTF-8 blobs with offset arrays, so that `load_snapshot`
+    can memory-map the file instead of unpickling it. Returns False if
+    the snapshot could not be written.
+
+    `stamps` are the `source_stamps` of the CSV files taken before they
+    were read, so a file replaced while parsing invalidates the snapshot.
+    """
+    arrays = {}
+    for prefix, ids, records, fields in (
+        ("person", graph.person_ids, people, ("name", "birth")),
+        ("movie", graph.movie_ids, movies, ("title", "year"))
+    ):
+        blob, offsets = encode_strings(ids)
+        arrays[f"{prefix}_ids"] = blob
+        arrays[f"{prefix}_id_offsets"] = offsets
+
+        # Indexes sorted by id, so ids can be found by bisection
+        arrays[f"{prefix}_by_id"] = array("i", sorted(
+            range(len(ids)), key=lambda i: blob[offsets[i]:offsets[i + 1]]
+        ))
+        for field in fields:
+            blob, offsets = encode_strings(
+                records[record_id].get(field, "") for record_id in ids
+            )
+            arrays[f"{prefix}_{field}s"] = blob
+            arrays[f"{prefix}_{field}_offsets"] = offsets
+
+    # Lowercase names in sorted order, each with its people CSR-style
+    keys = sorted(names)
+    arrays["name_keys"], arrays["name_key_offsets"] = encode_strings(keys)
+    name_offsets = array("q", [0])
+    name_people = array("i")
+    for key in keys:
+        name_people.extend(sorted(graph.person_index[pid] for pid in names[key]))
+        name_offsets.append(len(name_people))
+    arrays["name_offsets"] = name_offsets
+    arrays["name_people"] = name_people
+
+    for name in ("person_offsets", "person_movies",
+                 "movie_offsets", "movie_people"):
+        data = getattr(graph, name)
+        arrays[name] = data if isinstance(data, array) else array("i", data)
+
+    # Arrays follow the header, each starting on an 8-byte boundary
+    header = {
+        "sources": stamps,
+        "byteorder": sys.byteorder,
+        "itemsizes": {code: array(code).itemsize for code in "iq"},
+        "arrays": {}
+    }
+    offset = 0
+    for name, data in arrays.items():
+        if isinstance(data, bytes):
+            nbytes, typecode = len(data), "B"
+        else:
+            nbytes, typecode = len(data) * data.itemsize, data.typecode
+        header["arrays"][name] = (offset, nbytes, typecode)
+        offset += nbytes + (-nbytes % 8)
+    encoded = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+    padding = -(len(MAGIC) + 8 + len(encoded)) % 8
+
+    path = os.path.join(directory, SNAPSHOT)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(encoded) + padding))
+            f.write(encoded)
+            f.write(bytes(padding))
+            for data in arrays.values():
+                f.write(data)
+                f.write(bytes(-f.tell() % 8))
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_snapshot(directory):
+    """
+    Returns (names, people, movies, graph) from the snapshot in
+    `directory`, all backed by arrays memory-mapped from the file: ids
+    are found by bisection and `people` and `movies` entries are built
+    when they are looked up, so loading does not depend on data size.
+
+    Returns None if there is no snapshot or it does not match the
+    current CSV files.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            length, = struct.unpack("<Q", f.read(8))
+            header = pickle.loads(f.read(length))
+            if (header["sources"] != source_stamps(directory)
+                    or header["byteorder"] != sys.byteorder
+                    or header["itemsizes"] != {
+                        code: array(code).itemsize for code in "iq"
+                    }):
+                return None
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, EOFError, ValueError, KeyError, pickle.UnpicklingError):
+        return None
+
+    start = len(MAGIC) + 8 + length
+    arrays = {}
+    for name, (offset, nbytes, typecode) in header["arrays"].items():
+        arrays[name] = data[start + offset:start + offset + nbytes].cast(typecode)
+
+    def table(name, offsets=None):
+        return StringTable(arrays[name], arrays[offsets or f"{name[:-1]}_offsets"])
+
+    person_ids = table("person_ids", "person_id_offsets")
+    movie_ids = table("movie_ids", "movie_id_offsets")
+    person_index = IdIndex(person_ids, arrays["person_by_id"])
+    movie_index = IdIndex(movie_ids, arrays["movie_by_id"])
+    graph = CompactGraph(
+        person_ids, movie_ids,
+        arrays["person_offsets"], arrays["person_movies"],
+        arrays["movie_offsets"], arrays["movie_people"],
+        person_index, movie_index
+    )
+    people = Records(person_index, {
+        "name": table("person_names"), "birth": table("person_births")
+    })
+    movies = Records(movie_index, {
+        "title": table("movie_titles"), "year": table("movie_years")
+    })
+    names = Names(
+        table("name_keys", "name_key_offsets"),
+        arrays["name_offsets"], arrays["name_people"], person_ids
+    )
+    return names, people, movies, graph
+
+
+class StringTable(Sequence):
+    """
+    Sequence of the strings stored in a UTF-8 blob, the `i`th one being
+    `blob[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.raw(i), "utf-8")
+
+    def raw(self, i):
+        """
+        Returns the encoded bytes of the `i`th string.
+        """
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+class SortedStrings():
+    """
+    Sequence of a StringTable's encoded strings in the order of
+    `order`, for bisecting.
+    """
+
+    def __init__(self, table, order=None):
+        self.table = table
+        self.order = order
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, position):
+        if self.order is not None:
+            position = self.order[position]
+        return self.table.raw(position)
+
+
+def find(sorted_strings, key):
+    """
+    Returns the position of string `key` in `sorted_strings`, or None.
+    """
+    if not isinstance(key, str):
+        return None
+    encoded = key.encode("utf-8")
+    position = bisect.bisect_left(sorted_strings, encoded)
+    if position < len(sorted_strings) and sorted_strings[position] == encoded:
+        return position
+    return None
+
+
+class IdIndex(Mapping):
+    """
+    Maps each id in a StringTable to its index, by bisecting `order`,
+    the table's indexes sorted by id.
+    """
+
+    def __init__(self, ids, order):
+        self.ids = ids
+        self.order = order
+        self.sorted = SortedStrings(ids, order)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, key):
+        return find(self.sorted, key) is not None
+
+    def __getitem__(self, key):
+        position = find(self.sorted, key)
+        if position is None:
+            raise KeyError(key)
+        return self.order[position]
+
+
+class Records(Mapping):
+    """
+    Maps ids to dictionaries of their fields, built on each lookup from
+    the StringTable of each field in `fields`.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {field: strings[i] for field, strings in self.fields.items()}
+
+
+class Names(Mapping):
+    """
+    Maps lowercase names, stored sorted in `keys`, to the set of ids of
+    the people with that name: `people[offsets[k]:offsets[k + 1]]` are
+    the indexes into `person_ids` of the `k`th name's people.
+    """
+
+    def __init__(self, keys, offsets, people, person_ids):
+        self.keys_table = keys
+        self.sorted = SortedStrings(keys)
+        self.offsets = offsets
+        self.people = people
+        self.person_ids = person_ids
+
+    def __len__(self):
+        return len(self.keys_table)
+
+    def __iter__(self):
+        return iter(self.keys_table)
+
+    def __contains__(self, key):
+        return find(self.sorted, key) is not None
+
+    def __getitem__(self, key):
+        k = find(self.sorted, key)
+        if k is None:
+            raise KeyError(key)
+        return {
+            self.person_ids[person]
+            for person in self.people[self.offsets[k]:self.offsets[k + 1]]
+        }
@@ -1,3 +1,8 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Maps each state in the frontier to how many nodes hold it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +31,16 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
 
+    def discard_state(self, state):
+        if self.states[state] == 1:
+            del self.states[state]
+        else:
+            self.states[state] -= 1
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +48,154 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths keyed on the unordered pair of
+    people, so a path cached for A to B also answers B to A. Also keeps
+    the breadth-first parent trees of sources queried repeatedly, which
+    answer any later target from that source.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None, trees=8, tree_after=2):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_trees = trees
+        self.tree_after = tree_after
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.source_counts = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+
+    def get(self, source, target):
+        """
+        Returns the cached path from `source` to `target` as a list of
+        (movie_id, person_id) pairs, None if they are known not to be
+        connected, or MISS if nothing is cached for them.
+        """
+        with self.lock:
+            entry = self.lookup(self.paths, frozenset((source, target)))
+            if entry is not MISS:
+                self.hits += 1
+                path_source, path = entry
+                return path if path_source == source else reverse_path(
+                    path_source, path
+                )
+
+            for start, end in ((source, target), (target, source)):
+                parents = self.lookup(self.trees, start)
+                if parents is not MISS:
+                    self.tree_hits += 1
+                    path = path_from_parents(parents, end)
+                    return path if start == source else reverse_path(
+                        target, path
+                    )
+
+            self.misses += 1
+            return MISS
+
+    def put(self, source, target, path):
+        """
+        Caches the path (or None) found from `source` to `target`.
+        """
+        with self.lock:
+            self.store(self.paths, frozenset((source, target)),
+                       (source, path), self.maxsize)
+
+    def wants_tree(self, source):
+        """
+        Counts a search from `source` and returns True once it has been
+        searched from often enough that its whole parent tree is worth
+        computing and caching.
+        """
+        with self.lock:
+            count = self.source_counts.pop(source, 0) + 1
+            self.source_counts[source] = count
+            if len(self.source_counts) > self.maxsize:
+                self.source_counts.popitem(last=False)
+            return self.max_trees > 0 and count >= self.tree_after
+
+    def put_tree(self, source, parents):
+        """
+        Caches the parents of a breadth-first search from `source`, as
+        taken by `path_from_parents`.
+        """
+        with self.lock:
+            self.store(self.trees, source, parents, self.max_trees)
+
+    def info(self):
+        """
+        Returns a dictionary of hit and miss counts and current sizes.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "tree_hits": self.tree_hits,
+                "misses": self.misses,
+                "paths": len(self.paths),
+                "trees": len(self.trees),
+                "maxsize": self.maxsize
+            }
+
+    def lookup(self, entries, key):
+        if key not in entries:
+            return MISS
+        stored, value = entries[key]
+        if self.ttl is not None and time.monotonic() - stored > self.ttl:
+            del entries[key]
+            return MISS
+        entries.move_to_end(key)
+        return value
+
+    def store(self, entries, key, value, maxsize):
+        entries[key] = (time.monotonic(), value)
+        entries.move_to_end(key)
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+
+
+# Returned by PathCache.get when nothing is cached, since None is a result
+MISS = object()
+
+
+def reverse_path(source, path):
+    """
+    Given a list of (movie_id, person_id) pairs leading from `source`,
+    returns the pairs leading back from its last person to `source`.
+    """
+    if path is None:
+        return None
+    people = [source] + [person_id for _, person_id in path]
+    return [
+        (path[i][0], people[i])
+        for i in range(len(path) - 1, -1, -1)
+    ]
+
+
+def path_from_parents(parents, target):
+    """
+    Returns the list of (movie_id, person_id) pairs leading to `target`
+    in a breadth-first parents dictionary, or None if it was not reached.
+
+    `parents` maps each reached person to their (movie_id, person_id)
+    step back towards the start, or is an object such as a
+    `graph.ParentTree` that finds the path with its own `path_to`.
+    """
+    if not isinstance(parents, dict):
+        return parents.path_to(target)
+    if target not in parents:
+        return None
+    path = []
+    while parents[target] is not None:
+        movie_id, parent_id = parents[target]
+        path.append((movie_id, target))
+        target = parent_id
+    path.reverse()
+    return path
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import random
+import time
+
+from crawler import crawl_graph
+from sampling import parallel_walks, random_walk
+from solvers import SOLVERS, power_iteration
+
+DAMPING = 0.85
+
+# Tolerance of the power iteration that other results are compared to
+REFERENCE_TOLERANCE = 1e-10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic web corpora and benchmark PageRank."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser(
+        "generate", help="write a synthetic corpus of linked HTML pages"
+    )
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--pages", type=int, default=10000)
+    generate_parser.add_argument("--links", type=int, default=8,
+                                 help="mean links per page that has any")
+    generate_parser.add_argument("--dangling", type=float, default=0.1,
+                                 help="fraction of pages with no links")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser(
+        "run", help="time crawling, iteration and sampling on a corpus"
+    )
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--samples", type=int, nargs="+",
+                            default=[10000, 100000, 1000000])
+    run_parser.add_argument("--walkers", type=int, default=1,
+                            help="split sampling over independent walkers")
+    run_parser.add_argument("--solvers", nargs="+", choices=SOLVERS,
+                            default=list(SOLVERS))
+    run_parser.add_argument("--tolerance", type=float, default=0.001)
+    run_parser.add_argument("--processes", type=int,
+                            help="worker processes for crawling and walkers")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", action="store_true",
+                            help="print results as JSON lines")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        start = time.perf_counter()
+        links = generate(args.directory, args.pages, args.links,
+                         args.dangling, args.seed)
+        print(f"Wrote {args.pages} pages with {links} links to "
+              f"{args.directory} in {time.perf_counter() - start:.1f}s")
+    else:
+        for result in benchmark(args.directory, args.samples, args.walkers,
+                                args.solvers, args.tolerance,
+                                args.processes, args.seed):
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print_result(result)
+
+
+def generate(directory, num_pages, links=8, dangling=0.1, seed=0):
+    """
+    Writes `num_pages` HTML pages to `directory` linking to each other by
+    preferential attachment: each link goes to a page chosen with
+    probability proportional to one more than its links so far, so a few
+    pages collect most links. A `dangling` fraction of pages link nowhere.
+    Returns the number of links written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Every page appears once, plus once more per link it has received
+    popular = list(range(num_pages))
+    total = 0
+    for page in range(num_pages):
+        targets = set()
+        if rng.random() >= dangling:
+            degree = min(num_pages - 1, rng.randint(1, 2 * links - 1))
+            while len(targets) < degree:
+                target = rng.choice(popular)
+                if target != page:
+                    targets.add(target)
+            popular.extend(targets)
+        total += len(targets)
+
+        with open(os.path.join(directory, page_name(page)), "w",
+                  encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head><title>Page {page}"
+                    f"</title></head>\n<body>\n<h1>Page {page}</h1>\n")
+            for target in sorted(targets):
+                f.write(f'<p><a href="{page_name(target)}">'
+                        f'Page {target}</a></p>\n')
+            f.write("</body>\n</html>\n")
+    return total
+
+
+def page_name(page):
+    return f"{page}.html"
+
+
+def benchmark(directory, samples, walkers=1, solvers=tuple(SOLVERS),
+              tolerance=0.001, processes=None, seed=0):
+    """
+    Yields a result dictionary for crawling `directory`, for iterating
+    with each of `solvers` and for sampling each count in `samples`,
+    timing each phase and giving the L1 error of its ranks against a
+    tightly converged power iteration.
+    """
+    start = time.perf_counter()
+    graph = crawl_graph(directory, processes)
+    yield {
+        "phase": "crawl",
+        "pages": len(graph),
+        "links": len(graph.out_links),
+        "dangling": len(graph.dangling()),
+        "seconds": time.perf_counter() - start
+    }
+
+    reference, _ = power_iteration(
+        graph, DAMPING, REFERENCE_TOLERANCE, max_iterations=10000
+    )
+
+    for solver in solvers:
+        start = time.perf_counter()
+        ranks, trace = SOLVERS[solver](graph, DAMPING, tolerance)
+        yield {
+            "phase": "iterate",
+            "solver": solver,
+            "tolerance": tolerance,
+            "iterations": len(trace),
+            "seconds": time.perf_counter() - start,
+            "error": l1_error(ranks, reference)
+        }
+
+    for n in samples:
+        start = time.perf_counter()
+        if walkers > 1:
+            visits, _ = parallel_walks(
+                graph, DAMPING, n, walkers, processes, seed
+            )
+        else:
+            visits = random_walk(graph, DAMPING, n, random.Random(seed))
+        yield {
+            "phase": "sample",
+            "samples": n,
+            "walkers": walkers,
+            "seconds": time.perf_counter() - start,
+            "error": l1_error([count / n for count in visits], reference)
+        }
+
+
+def l1_error(ranks, reference):
+    """
+    Returns the sum of absolute differences between `ranks` and
+    `reference`, sequences of ranks by page index.
+    """
+    return sum(abs(rank - exact) for rank, exact in zip(ranks, reference))
+
+
+def print_result(result):
+    if result["phase"] == "crawl":
+        print(f"Crawled {result['pages']} pages with {result['links']} "
+              f"links ({result['dangling']} dangling) "
+              f"in {result['seconds']:.2f}s")
+    elif result["phase"] == "iterate":
+        print(f"Iterated with {result['solver']}: "
+              f"{result['iterations']} iterations in "
+              f"{result['seconds']:.2f}s, L1 error {result['error']:.2e}")
+    else:
+        print(f"Sampled {result['samples']} steps "
+              f"({result['walkers']} walkers) in {result['seconds']:.2f}s, "
+              f"L1 error {result['error']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import posixpath
+import re
+from array import array
+
+from linkgraph import LinkGraph
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes of HTML read at a time, so large pages are never held whole
+CHUNK_SIZE = 1 << 16
+
+# Corpora with fewer pages than this are parsed without a worker pool
+PARALLEL_PAGES = 256
+
+
+def find_pages(directory):
+    """
+    Returns the paths of all HTML pages under `directory`, relative to
+    it and with "/" separators, in sorted order.
+    """
+    pages = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        relative = os.path.relpath(root, directory)
+        for filename in files:
+            if filename.endswith(".html"):
+                page = filename if relative == "." else f"{relative}/{filename}"
+                pages.append(page.replace(os.sep, "/"))
+    pages.sort()
+    return pages
+
+
+def read_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the href of every link in the HTML file at `path`, reading
+    it in chunks of `chunk_size` characters.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        carry = ""
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = carry + chunk
+            if not chunk:
+                yield from LINK.findall(buffer)
+                return
+
+            # Hold back from the last tag opening, which may be cut off
+            cut = buffer.rfind("<")
+            if cut == -1:
+                cut = len(buffer)
+            yield from LINK.findall(buffer, 0, cut)
+            carry = buffer[cut:]
+
+
+def normalize_link(page, link):
+    """
+    Returns the corpus page name that `link` on `page` refers to, or None
+    for links to other sites. Relative links are resolved against the
+    page's directory, and query strings and fragments are dropped.
+    """
+    link = link.split("#", 1)[0].split("?", 1)[0]
+    if not link or re.match(r"[a-zA-Z][a-zA-Z0-9+.-]*:|//", link):
+        return None
+    if link.startswith("/"):
+        link = link.lstrip("/")
+    else:
+        link = posixpath.join(posixpath.dirname(page), link)
+    link = posixpath.normpath(link)
+    return None if link.startswith("..") else link
+
+
+def parse_page(task):
+    """
+    Returns `page` and the normalized set of links found in its file.
+    """
+    directory, page = task
+    links = set()
+    for link in read_links(os.path.join(directory, *page.split("/"))):
+        link = normalize_link(page, link)
+        if link is not None:
+            links.add(link)
+    return page, links
+
+
+def parse_pages(directory, pages, processes=None):
+    """
+    Yields (page, links) for each page name in `pages`, in order,
+    parsing them across a pool of `processes` worker processes (one per
+    CPU if None) when there are many of them.
+    """
+    tasks = [(directory, page) for page in pages]
+    if processes == 1 or len(tasks) < PARALLEL_PAGES:
+        yield from map(parse_page, tasks)
+        return
+    chunksize = max(1, len(tasks) // ((processes or os.cpu_count() or 1) * 8))
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(parse_page, tasks, chunksize)
+
+
+def build_graph(pages, page_links):
+    """
+    Returns a LinkGraph over the page names in `pages`, given an iterable
+    of (page, links) pairs. Links to pages outside `pages` and from a
+    page to itself are left out.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    sources = array("i")
+    targets = array("i")
+    for page, links in page_links:
+        source = index[page]
+        for link in sorted(links):
+            target = index.get(link)
+            if target is not None and target != source:
+                sources.append(source)
+                targets.append(target)
+    return LinkGraph.from_edges(pages, sources, targets)
+
+
+def crawl_graph(directory, processes=None):
+    """
+    Parses every HTML page under `directory`, across a pool of
+    `processes` worker processes for large corpora (one per CPU if None),
+    and returns a LinkGraph of the links between pages in the corpus.
+    """
+    pages = find_pages(directory)
+    return build_graph(pages, parse_pages(directory, pages, processes))
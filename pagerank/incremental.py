@@ -0,0 +1,118 @@
+import hashlib
+import os
+import pickle
+
+from crawler import build_graph, find_pages, parse_pages
+from solvers import SOLVERS
+from store import write_store
+
+# File in the corpus directory holding the state of the last update
+STATE = ".pagerank-state"
+
+
+def file_hash(path):
+    """
+    Returns the SHA-1 hex digest of the contents of the file at `path`.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_state(path):
+    """
+    Returns the state saved at `path` by `update_pagerank`, or None if
+    there is none or it cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def save_state(path, state):
+    """
+    Writes `state` to `path`, replacing any previous state at once.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def update_pagerank(directory, damping_factor, tolerance=0.001,
+                    state_path=None, processes=None, store_path=None,
+                    solver="power"):
+    """
+    Computes PageRank for the corpus in `directory`, reusing the state
+    saved by the previous call: only pages whose size, modification time
+    and contents changed are parsed again, and `solver`, one of SOLVERS,
+    starts from the previous ranks instead of a uniform vector.
+
+    If `store_path` is given, the graph and ranks are also written to
+    a store there. Returns a dictionary of PageRank values and a report
+    dictionary counting added, changed, removed and unchanged pages and
+    iterations, with the convergence trace under "trace".
+    """
+    if state_path is None:
+        state_path = os.path.join(directory, STATE)
+    state = load_state(state_path) or {}
+    previous = state.get("pages", {})
+
+    pages = find_pages(directory)
+    entries = {}
+    stale = []
+    report = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+    for page in pages:
+        path = os.path.join(directory, *page.split("/"))
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old = previous.get(page)
+        if old is not None and (old["size"], old["mtime"]) == (
+            entry["size"], entry["mtime"]
+        ):
+            entry["hash"] = old["hash"]
+        else:
+            entry["hash"] = file_hash(path)
+        if old is not None and old["hash"] == entry["hash"]:
+            entry["links"] = old["links"]
+            report["unchanged"] += 1
+        else:
+            stale.append(page)
+            report["changed" if old is not None else "added"] += 1
+        entries[page] = entry
+    report["removed"] = len(set(previous) - set(entries))
+
+    for page, links in parse_pages(directory, stale, processes):
+        entries[page]["links"] = frozenset(links)
+
+    graph = build_graph(
+        pages, ((page, entries[page]["links"]) for page in pages)
+    )
+
+    # Warm start from the previous ranks, giving new pages an even share
+    ranks = None
+    previous_ranks = state.get("ranks")
+    if previous_ranks and state.get("damping") == damping_factor and pages:
+        ranks = [previous_ranks.get(page, 1 / len(pages)) for page in pages]
+        total = sum(ranks)
+        ranks = [rank / total for rank in ranks]
+
+    values, trace = SOLVERS[solver](
+        graph, damping_factor, tolerance, ranks=ranks
+    )
+    report["iterations"] = len(trace)
+    report["trace"] = trace
+    result = graph.to_ranks(values)
+    if store_path is not None:
+        write_store(store_path, graph, {"iteration": values},
+                    damping=damping_factor)
+    save_state(state_path, {
+        "pages": entries,
+        "ranks": result,
+        "damping": damping_factor
+    })
+    return result, report
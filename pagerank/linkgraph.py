@@ -0,0 +1,110 @@
+from array import array
+
+
+class LinkGraph():
+    """
+    Link graph of a corpus with page names interned to dense integers.
+
+    Links are stored CSR-style in both directions: the pages linked to by
+    page `p` are `out_links[out_offsets[p]:out_offsets[p + 1]]`, and the
+    pages linking to it are `in_links[in_offsets[p]:in_offsets[p + 1]]`.
+    """
+
+    def __init__(self, pages, out_offsets, out_links, in_offsets, in_links):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.out_offsets = out_offsets
+        self.out_links = out_links
+        self.in_offsets = in_offsets
+        self.in_links = in_links
+
+    @classmethod
+    def from_edges(cls, pages, sources, targets):
+        """
+        Builds a graph from a list of page names and parallel arrays of
+        the source and target page index of each link.
+        """
+        out_offsets, out_links = csr(len(pages), sources, targets)
+        in_offsets, in_links = csr(len(pages), targets, sources)
+        return cls(list(pages), out_offsets, out_links, in_offsets, in_links)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds a graph from a corpus dictionary mapping each page to the
+        set of pages it links to, as returned by `crawl`.
+        """
+        # Sorting keeps page indexes, and so seeded samples, the same
+        # from run to run despite set ordering varying with hash seeds
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = array("i")
+        targets = array("i")
+        for page in pages:
+            source = index[page]
+            for link in sorted(corpus[page]):
+                sources.append(source)
+                targets.append(index[link])
+        return cls.from_edges(pages, sources, targets)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def out_degree(self, page):
+        """
+        Returns the number of pages linked to by page index `page`.
+        """
+        return self.out_offsets[page + 1] - self.out_offsets[page]
+
+    def links_of(self, page):
+        """
+        Returns the page indexes linked to by page index `page`.
+        """
+        return self.out_links[self.out_offsets[page]:self.out_offsets[page + 1]]
+
+    def linked_from(self, page):
+        """
+        Returns the page indexes that link to page index `page`.
+        """
+        return self.in_links[self.in_offsets[page]:self.in_offsets[page + 1]]
+
+    def dangling(self):
+        """
+        Returns the indexes of pages with no links to other pages.
+        """
+        offsets = self.out_offsets
+        return [p for p in range(len(self.pages)) if offsets[p] == offsets[p + 1]]
+
+    def to_corpus(self):
+        """
+        Returns the graph as a corpus dictionary like `crawl` returns.
+        """
+        return {
+            page: {self.pages[link] for link in self.links_of(i)}
+            for i, page in enumerate(self.pages)
+        }
+
+    def to_ranks(self, values):
+        """
+        Returns a dictionary mapping page names to `values` by page index.
+        """
+        return dict(zip(self.pages, values))
+
+
+def csr(size, rows, columns):
+    """
+    Groups `columns` by their entry in `rows`, returning an offsets array
+    of length `size + 1` and the grouped column values.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array("i", [0]) * len(columns)
+    position = offsets[:-1]
+    for row, column in zip(rows, columns):
+        values[position[row]] = column
+        position[row] += 1
+    return offsets, values
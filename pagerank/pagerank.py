@@ -1,24 +1,158 @@
+import argparse
 import os
-import random
-import re
 import sys
 
+from crawler import crawl_graph
+from incremental import STATE, update_pagerank
+from linkgraph import LinkGraph
+from sampling import confidence_intervals, parallel_walks, random_walk
+from solvers import SOLVERS, personalized_iteration
+from store import STORE, RankStore, write_store
+
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 0.001
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+    parser = argparse.ArgumentParser(description="Compute PageRank.")
+    parser.add_argument("corpus")
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help="number of random surfer steps to sample")
+    parser.add_argument("--walkers", type=int, default=1,
+                        help="split sampling over independent walkers "
+                             "and report confidence intervals")
+    parser.add_argument("--processes", type=int,
+                        help="worker processes for crawling and for the "
+                             "walkers (default one per CPU)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the walkers")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only iterate, reparsing changed pages and "
+                             "starting from the last run's ranks")
+    parser.add_argument("--state", metavar="PATH",
+                        help="file for --incremental state (default "
+                             f"{STATE} in the corpus)")
+    parser.add_argument("--save", action="store_true",
+                        help="save the link graph and ranks to the store")
+    parser.add_argument("--store", metavar="PATH",
+                        help=f"store file (default {STORE} in the corpus)")
+    parser.add_argument("--solver", choices=SOLVERS, default="power",
+                        help="iterative solver (default power)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="stop iterating once the ranks change by "
+                             f"less than this in total (default {TOLERANCE})")
+    parser.add_argument("--trace", action="store_true",
+                        help="print the residual after each iteration")
+    parser.add_argument("--topic", metavar="NAME=PAGE,...", action="append",
+                        help="also rank pages for a surfer who teleports to "
+                             "the given seed pages (repeatable)")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--top", metavar="K", type=int,
+                       help="print the K highest ranked pages in the store")
+    query.add_argument("--rank", metavar="PAGE",
+                       help="print the ranks of PAGE in the store")
+    args = parser.parse_args()
+    if args.walkers > args.samples:
+        parser.error("--walkers cannot exceed --samples")
+    if args.incremental and args.topic:
+        parser.error("--topic cannot be combined with --incremental")
+    store_path = args.store or os.path.join(args.corpus, STORE)
+
+    if args.top is not None or args.rank is not None:
+        try:
+            store = RankStore(store_path)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Could not open store: {e}")
+        if args.top is not None:
+            for method in store.methods:
+                print(f"Top {args.top} pages by {method}")
+                for page, rank in store.top(args.top, method):
+                    print(f"  {page}: {rank:.4f}")
+        elif store.find(args.rank) is None:
+            sys.exit("Page not found.")
+        else:
+            for method in store.methods:
+                print(f"{args.rank} by {method}: "
+                      f"{store.rank(args.rank, method):.4f}")
+        return
+
+    if args.incremental:
+        ranks, report = update_pagerank(
+            args.corpus, DAMPING, args.tolerance, args.state, args.processes,
+            store_path if args.save else None, args.solver
+        )
+        print(f"Pages: {report['added']} added, {report['changed']} changed, "
+              f"{report['removed']} removed, {report['unchanged']} unchanged")
+        print(f"PageRank Results from Iteration ({args.solver}, "
+              f"{report['iterations']} iterations)")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        if args.trace:
+            print_trace(report["trace"])
+        return
+
+    topics = {}
+    for topic in args.topic or []:
+        name, _, seeds = topic.partition("=")
+        if not seeds:
+            sys.exit(f"Topic must be NAME=PAGE,...: {topic}")
+        topics[name] = seeds.split(",")
+
+    corpus = crawl_graph(args.corpus, args.processes)
+    if args.walkers > 1:
+        ranks, intervals = parallel_sample_pagerank(
+            corpus, DAMPING, args.samples, args.walkers,
+            args.processes, args.seed
+        )
+        print(f"PageRank Results from Sampling (n = {args.samples}, "
+              f"{args.walkers} walkers, 95% confidence)")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f} +/- {intervals[page]:.4f}")
+    else:
+        ranks = sample_pagerank(corpus, DAMPING, args.samples)
+        print(f"PageRank Results from Sampling (n = {args.samples})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+    sampled = ranks
+    trace = []
+    ranks = iterate_pagerank(
+        corpus, DAMPING, args.tolerance, args.solver, trace
+    )
+    print(f"PageRank Results from Iteration ({args.solver}, "
+          f"{len(trace)} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    if topics:
+        try:
+            personalized = personalized_pagerank(
+                corpus, DAMPING, topics, args.tolerance
+            )
+        except ValueError as e:
+            sys.exit(str(e))
+        for name, topic_ranks in personalized.items():
+            print(f"PageRank Results for Topic {name}")
+            for page in sorted(topic_ranks):
+                print(f"  {page}: {topic_ranks[page]:.4f}")
+    if args.trace:
+        print_trace(trace)
+
+    if args.save:
+        write_store(store_path, corpus, {
+            "iteration": [ranks[page] for page in corpus.pages],
+            "sampling": [sampled[page] for page in corpus.pages]
+        }, damping=DAMPING, samples=args.samples)
+
+
+def print_trace(trace):
+    """
+    Prints the residual and elapsed seconds after each iteration in
+    `trace`, a list of entries from a solver.
+    """
+    print("Convergence")
+    for i, entry in enumerate(trace, 1):
+        print(f"  {i}: residual {entry['residual']:.3e} "
+              f"after {entry['seconds']:.4f}s")
 
 
 def crawl(directory):
@@ -26,26 +160,20 @@ def crawl(directory):
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Pages in subdirectories are named by their path relative to
+    `directory`, and relative links are resolved against each page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+    return crawl_graph(directory).to_corpus()
 
-    return pages
+
+def as_graph(corpus):
+    """
+    Returns `corpus` as a LinkGraph, converting it if it is a dictionary.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -72,36 +200,45 @@ def transition_model(corpus, page, damping_factor):
         
 
 def sample_pagerank(corpus, damping_factor, n):
-    
-    #This function works by choosing a page at random and then choosing the next page based on the probability of each page. It repeats this process n times and then returns the probability of each page after n samples
-    """"
+    """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Links are laid out as arrays once up front, so each sample
+    takes constant time rather than rebuilding the transition model.
     """
-    pages = list(corpus.keys()) # list of all pages
-    prob = dict() # dictionary to store the probability of each page
+    graph = as_graph(corpus)
+    visits = random_walk(graph, damping_factor, n)
+    return graph.to_ranks(count / n for count in visits)
 
-    # Initialize the probability of each page to 0 becuase we have not chosen any page yet
-    for page in pages:
-        prob[page] = 0
-    
-    first_page = random.choice(pages) # choose a page at random
-    prob[first_page] = 1/n # set the probability of the first page to 1/n because we have chosen it once where n is the number of samples and also the number of times we will choose a page
-
-    current_prob = transition_model(corpus, first_page, damping_factor) # get the probability of each page after the first sample
-    for i in range(n-1):# repeat the process n-1 times
-        next_page = random.choices(pages, weights = current_prob.values(), k = 1)[0] # choose the next page based on the probability of each page
-        prob[next_page] += 1/n# we are choosing the next page once, so we add 1/n to the probability of the next page so as to get the probability of the next page after n samples
-        current_prob = transition_model(corpus, next_page, damping_factor) # get the probability of each page after the next sample
-    print(sum(prob.values()))
-    return prob # return the probability of each page after n samples
-
-def iterate_pagerank(corpus, damping_factor):
-    #This function is based on the formula given in the lecture and it works by iteratively updating the probability of each page until convergence
+
+def parallel_sample_pagerank(corpus, damping_factor, n, walkers,
+                             processes=None, seed=0):
+    """
+    Return PageRank values for each page by sampling `n` pages split
+    over `walkers` independent random surfers run across `processes`
+    worker processes, with reproducible per-walker seeds.
+
+    Return a dictionary of PageRank values like `sample_pagerank`, and
+    a dictionary mapping each page to the half-width of the 95%
+    confidence interval of its value.
+    """
+    graph = as_graph(corpus)
+    visits, counts = parallel_walks(
+        graph, damping_factor, n, walkers, processes, seed
+    )
+    return (
+        graph.to_ranks(count / n for count in visits),
+        graph.to_ranks(confidence_intervals(counts))
+    )
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     solver="power", trace=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -109,33 +246,53 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Iteration runs over a sparse link graph, so each round costs time
+    proportional to the number of links, and stops once the ranks
+    change by less than `tolerance` in total. `solver` names one of
+    SOLVERS; if `trace` is a list, the residual and elapsed seconds after
+    each iteration are appended to it.
     """
-    
-    pages = list(corpus.keys()) # list of all pages
-    prob = dict() # dictionary to store the probability of each page
-    new_prob = dict() # dictionary to store the new probability of each page
-    
-        # Initialize the probability of each page to 1/N
-    for page in pages:
-        prob[page] = 1/len(pages)
-        new_prob[page] = 0
-    iterations = 0
-    
-        # Repeat until convergence
-    while True:
-        iterations +=1
-        for page in pages:
-            # The new probability of a page is the sum of (probability of each page that links to it * damping factor / number of links in that page) + ((1-damping factor)/N)
-            new_prob[page] = sum(prob[p] * damping_factor/len(corpus[p]) for p in pages if page in corpus[p]) + (1-damping_factor)/len(pages)
-        # If the difference between the new probability and the old probability of each page is less than 0.001, then we have converged
-        if all(abs(new_prob[page] - prob[page]) < 0.001 for page in pages):
-            break
-            # If we have not converged, then the new probability of each page becomes the old probability of each page
-        else:
-            prob = new_prob.copy()
-    print(sum(prob.values()))
-    print(iterations)
-    return prob # return the probability of each page after convergence
+    graph = as_graph(corpus)
+    ranks, entries = SOLVERS[solver](graph, damping_factor, tolerance)
+    if trace is not None:
+        trace.extend(entries)
+    return graph.to_ranks(ranks)
+
+
+def personalized_pagerank(corpus, damping_factor, topics,
+                          tolerance=TOLERANCE):
+    """
+    Return topic-sensitive PageRank values for each topic in `topics`,
+    a dictionary mapping a topic name to its seed pages: either an
+    iterable of pages, teleported to with equal probability, or a
+    dictionary mapping pages to teleport weights.
+
+    Return a dictionary mapping each topic name to a dictionary of
+    PageRank values like `iterate_pagerank`. All topics are solved
+    together, sharing each pass over the links.
+    """
+    graph = as_graph(corpus)
+    teleports = []
+    for name, seeds in topics.items():
+        if not isinstance(seeds, dict):
+            seeds = dict.fromkeys(seeds, 1)
+        teleport = [0.0] * len(graph)
+        for page, weight in seeds.items():
+            if page not in graph.index:
+                raise ValueError(f"Topic {name}: page not found: {page}")
+            teleport[graph.index[page]] += weight
+        total = sum(teleport)
+        if total <= 0:
+            raise ValueError(f"Topic {name} has no seed pages")
+        teleports.append([weight / total for weight in teleport])
+
+    matrix, _ = personalized_iteration(
+        graph, damping_factor, teleports, tolerance
+    )
+    return {
+        name: graph.to_ranks(ranks) for name, ranks in zip(topics, matrix)
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import math
+import multiprocessing
+import random
+from array import array
+
+
+def random_walk(graph, damping_factor, n, rng=random):
+    """
+    Walks `n` steps of the random surfer over a `LinkGraph`, starting at
+    a random page, and returns an array counting visits by page index.
+
+    Each step follows a random link from the current page with
+    probability `damping_factor`, and otherwise, or from a page with no
+    links, jumps to a page chosen uniformly at random, so every step
+    takes constant time.
+    """
+    size = len(graph)
+    offsets = graph.out_offsets
+    links = graph.out_links
+    visits = array("q", [0]) * size
+    uniform = rng.random
+
+    page = int(uniform() * size)
+    for _ in range(n):
+        visits[page] += 1
+        start = offsets[page]
+        degree = offsets[page + 1] - start
+        if degree and uniform() < damping_factor:
+            page = links[start + int(uniform() * degree)]
+        else:
+            page = int(uniform() * size)
+    return visits
+
+
+# LinkGraph walked by pool workers, set once per worker process
+worker_graph = None
+
+
+def set_worker_graph(graph):
+    global worker_graph
+    worker_graph = graph
+
+
+def walker_visits(task):
+    """
+    Runs one walker of `parallel_walks` in a worker process.
+    """
+    steps, damping_factor, seed = task
+    return random_walk(worker_graph, damping_factor, steps, random.Random(seed))
+
+
+def parallel_walks(graph, damping_factor, n, walkers, processes=None, seed=0):
+    """
+    Splits `n` random surfer steps over `walkers` independent walkers,
+    run across a pool of `processes` worker processes (one per CPU if
+    None). Walker `i` is seeded from `seed` and `i`, so results do not
+    depend on how walkers are scheduled. There are never more walkers
+    than steps, so that every walker takes at least one.
+
+    Returns the merged visit counts and a list of each walker's counts.
+    """
+    walkers = min(walkers, n)
+    tasks = [
+        (n // walkers + (i < n % walkers), damping_factor, f"{seed}-{i}")
+        for i in range(walkers)
+    ]
+    if processes == 1:
+        set_worker_graph(graph)
+        counts = [walker_visits(task) for task in tasks]
+    else:
+        # Forked workers inherit the graph; spawned ones receive one
+        # pickled copy each rather than one per walker
+        context = multiprocessing.get_context(
+            "fork" if "fork" in multiprocessing.get_all_start_methods()
+            else None
+        )
+        with context.Pool(processes, set_worker_graph, (graph,)) as pool:
+            counts = pool.map(walker_visits, tasks)
+
+    total = array("q", [0]) * len(graph)
+    for visits in counts:
+        for page, count in enumerate(visits):
+            total[page] += count
+    return total, counts
+
+
+def confidence_intervals(counts, z=1.96):
+    """
+    Returns, for each page index, the half-width of the confidence
+    interval of its PageRank estimate (95% for the default `z`), from
+    the spread of the independent walkers' visit counts in `counts`.
+    Walkers that took no steps estimate nothing and are left out.
+    """
+    size = len(counts[0]) if counts else 0
+    steps = [sum(visits) for visits in counts]
+    counts = [visits for visits, total in zip(counts, steps) if total]
+    steps = [total for total in steps if total]
+    walkers = len(counts)
+    if walkers < 2:
+        return [float("inf")] * size
+    intervals = []
+    for page in range(size):
+        estimates = [
+            visits[page] / total for visits, total in zip(counts, steps)
+        ]
+        mean = sum(estimates) / walkers
+        variance = sum((e - mean) ** 2 for e in estimates) / (walkers - 1)
+        intervals.append(z * math.sqrt(variance / walkers))
+    return intervals
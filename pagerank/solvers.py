@@ -0,0 +1,437 @@
+import time
+from itertools import compress
+from operator import add, mul, sub
+
+# Iterations between extrapolation steps in the extrapolating solvers
+EXTRAPOLATION_PERIOD = 10
+
+# Fraction of pages that must have converged before adaptive iteration
+# skips them, as sweeps over most pages cost more than full sweeps
+ADAPTIVE_FROZEN = 0.25
+
+# Full sweeps of adaptive iteration between counts of converged pages
+ADAPTIVE_CHECK = 4
+
+
+class Problem():
+    """
+    The parts of a `LinkGraph` the solvers read on every iteration.
+    """
+
+    def __init__(self, graph, damping_factor):
+        self.n = len(graph)
+        self.damping_factor = damping_factor
+        self.out_degree = [graph.out_degree(p) for p in range(self.n)]
+        self.dangling = graph.dangling()
+        self.in_offsets = graph.in_offsets
+        self.in_links = graph.in_links
+        self.teleport = (1 - damping_factor) / self.n
+
+    def start(self, ranks):
+        """
+        Returns a list of starting ranks, uniform if `ranks` is None.
+        """
+        return list(ranks) if ranks is not None else [1 / self.n] * self.n
+
+    def base(self, rank):
+        """
+        Returns the rank every page receives from teleporting and from
+        pages with no links, which are treated as linking to every page.
+        """
+        dangling = sum(map(rank.__getitem__, self.dangling))
+        return self.teleport + self.damping_factor * dangling / self.n
+
+    def shares(self, rank):
+        """
+        Returns the rank each page passes along each of its links.
+        """
+        return [r / d if d else 0.0 for r, d in zip(rank, self.out_degree)]
+
+    def step(self, rank, pages=None):
+        """
+        Returns the ranks after one power iteration step from `rank`,
+        recomputing only `pages` (all pages if None).
+        """
+        base = self.base(rank)
+        get_share = self.shares(rank).__getitem__
+        in_offsets = self.in_offsets
+        in_links = self.in_links
+        damping_factor = self.damping_factor
+        if pages is None:
+            pages = range(self.n)
+            new_rank = [0.0] * self.n
+        else:
+            new_rank = list(rank)
+        for p in pages:
+            new_rank[p] = base + damping_factor * sum(
+                map(get_share, in_links[in_offsets[p]:in_offsets[p + 1]])
+            )
+        return new_rank
+
+
+def power_iteration(graph, damping_factor, tolerance=0.001,
+                    max_iterations=1000, ranks=None):
+    """
+    Computes PageRank over a `LinkGraph` by power iteration, starting
+    from `ranks` (a sequence by page index) or from a uniform vector.
+
+    Pages with no links are treated as linking to every page. Iteration
+    stops once the L1 norm of the change in ranks is below `tolerance`.
+    Returns the list of ranks by page index and the convergence trace,
+    a list of the residual and elapsed seconds after each iteration.
+    """
+    problem = Problem(graph, damping_factor)
+    rank = problem.start(ranks)
+    trace = Trace()
+    while len(trace) < max_iterations:
+        new_rank = problem.step(rank)
+        residual = l1_distance(new_rank, rank)
+        rank = new_rank
+        trace.record(residual)
+        if residual < tolerance:
+            break
+    return rank, trace.entries
+
+
+def gauss_seidel(graph, damping_factor, tolerance=0.001,
+                 max_iterations=1000, ranks=None):
+    """
+    Computes PageRank like `power_iteration`, but updates ranks in place
+    during each sweep so later pages already use this sweep's values,
+    which usually converges in fewer sweeps.
+    """
+    problem = Problem(graph, damping_factor)
+    rank = problem.start(ranks)
+    share = problem.shares(rank)
+    get_share = share.__getitem__
+    out_degree = problem.out_degree
+    in_offsets = problem.in_offsets
+    in_links = problem.in_links
+    n = problem.n
+    dangling = sum(map(rank.__getitem__, problem.dangling))
+
+    trace = Trace()
+    while len(trace) < max_iterations:
+        previous = list(rank)
+        for p in range(n):
+            value = problem.teleport + damping_factor * (
+                dangling / n
+                + sum(map(get_share, in_links[in_offsets[p]:in_offsets[p + 1]]))
+            )
+            if out_degree[p]:
+                share[p] = value / out_degree[p]
+            else:
+                dangling += value - rank[p]
+            rank[p] = value
+
+        # In-place sweeps let the total drift from 1, so rescale each time
+        scale = 1 / sum(rank)
+        rank = [r * scale for r in rank]
+        share = [s * scale for s in share]
+        get_share = share.__getitem__
+        dangling *= scale
+
+        residual = l1_distance(rank, previous)
+        trace.record(residual)
+        if residual < tolerance:
+            break
+    return rank, trace.entries
+
+
+def aitken_extrapolation(graph, damping_factor, tolerance=0.001,
+                         max_iterations=1000, ranks=None):
+    """
+    Computes PageRank like `power_iteration`, periodically replacing the
+    ranks with the Aitken delta-squared extrapolation of the last three
+    iterates, which removes the slowest decaying error component.
+    """
+    return extrapolated_iteration(
+        graph, damping_factor, tolerance, max_iterations, ranks, aitken, 3
+    )
+
+
+def quadratic_extrapolation(graph, damping_factor, tolerance=0.001,
+                            max_iterations=1000, ranks=None):
+    """
+    Computes PageRank like `power_iteration`, periodically replacing the
+    ranks with the quadratic extrapolation of the last four iterates
+    (Kamvar et al.), which removes the two slowest error components.
+    """
+    return extrapolated_iteration(
+        graph, damping_factor, tolerance, max_iterations, ranks, quadratic, 4
+    )
+
+
+def adaptive_iteration(graph, damping_factor, tolerance=0.001,
+                       max_iterations=1000, ranks=None):
+    """
+    Computes PageRank like `power_iteration`, but stops recomputing each
+    page once its own rank changes by less than `tolerance` times
+    (1 - `damping_factor`) divided by the number of pages, so that later
+    iterations only touch the pages that are still converging. Pages are
+    only skipped once at least ADAPTIVE_FROZEN of them have converged,
+    checked every ADAPTIVE_CHECK full iterations; until then this is
+    power iteration. Once the remaining pages change by less than
+    `tolerance` in total, all pages are recomputed to catch pages frozen
+    too early, and only such a full iteration can end the iteration.
+    """
+    problem = Problem(graph, damping_factor)
+    rank = problem.start(ranks)
+    share = problem.shares(rank)
+    inverse_degree = [1 / d if d else 0.0 for d in problem.out_degree]
+    in_offsets = problem.in_offsets
+    in_links = problem.in_links
+    n = problem.n
+
+    # A page's error shrinks by about the damping factor per iteration,
+    # so it can still be 1 / (1 - damping_factor) times its last change
+    threshold = tolerance * (1 - damping_factor) / n
+    active = None
+
+    trace = Trace()
+    while len(trace) < max_iterations:
+        full = active is None
+        pages = range(n) if full else active
+        base = problem.base(rank)
+        get_share = share.__getitem__
+        values = [
+            base + damping_factor * sum(
+                map(get_share, in_links[in_offsets[p]:in_offsets[p + 1]])
+            )
+            for p in pages
+        ]
+        if full and (len(trace) + 1) % ADAPTIVE_CHECK:
+            changes = None
+            residual = l1_distance(values, rank)
+        else:
+            old = rank if full else map(rank.__getitem__, pages)
+            changes = list(map(abs, map(sub, values, old)))
+            residual = sum(changes)
+
+        # Only the recomputed pages change, so only their shares do
+        if full:
+            rank = values
+            share = problem.shares(rank)
+        else:
+            for p, value in zip(pages, values):
+                rank[p] = value
+                share[p] = value * inverse_degree[p]
+        trace.record(residual)
+
+        if residual < tolerance:
+            if full:
+                break
+            active = None
+        elif changes is None or len(changes) - sum(
+            map(threshold.__gt__, changes)
+        ) > (1 - ADAPTIVE_FROZEN) * n:
+            active = None
+        else:
+            active = list(compress(pages, map(threshold.__le__, changes)))
+
+    total = sum(rank)
+    return [r / total for r in rank], trace.entries
+
+
+def personalized_iteration(graph, damping_factor, teleports,
+                           tolerance=0.001, max_iterations=1000):
+    """
+    Computes personalized PageRank over a `LinkGraph` for every teleport
+    vector in `teleports` (sequences by page index, each summing to 1)
+    together, by power iteration. Surfers that teleport, or that reach a
+    page with no links, jump to a page chosen by their teleport vector.
+
+    Ranks are held by page, as a row of one value per teleport vector,
+    so each iteration reads every link once and adds the linking page's
+    whole row of shares into the linked page's row. Iteration stops once
+    every vector's ranks change by less than `tolerance`. Returns the
+    rank matrix, a list of ranks by page index for each teleport vector,
+    and the convergence trace, whose residual is the largest change of
+    any vector.
+    """
+    problem = Problem(graph, damping_factor)
+    in_offsets = problem.in_offsets
+    in_links = problem.in_links
+    weights = [damping_factor / d if d else 0.0 for d in problem.out_degree]
+    zeros = (0.0,) * len(teleports)
+    rows = list(zip(*teleports))
+
+    # Only pages some vector teleports to receive teleporting surfers
+    seeds = {}
+    for p, row in enumerate(rows):
+        if any(row):
+            seeds[p] = row
+
+    trace = Trace()
+    while rows and len(trace) < max_iterations:
+        # Each page's row of shares already includes the damping factor
+        get_shares = [
+            tuple(map(weight.__mul__, row))
+            for weight, row in zip(weights, rows)
+        ].__getitem__
+        dangling = list(map(sum, zip(*map(rows.__getitem__, problem.dangling))))
+        jumps = [
+            1 - damping_factor + damping_factor * mass
+            for mass in (dangling or zeros)
+        ]
+
+        new_rows = []
+        for p in range(problem.n):
+            start, end = in_offsets[p], in_offsets[p + 1]
+            if end - start > 1:
+                new_rows.append(tuple(map(
+                    sum, zip(*map(get_shares, in_links[start:end]))
+                )))
+            elif end > start:
+                new_rows.append(get_shares(in_links[start]))
+            else:
+                new_rows.append(zeros)
+        for p, teleport_row in seeds.items():
+            new_rows[p] = tuple(map(
+                add, new_rows[p], map(mul, jumps, teleport_row)
+            ))
+
+        residual = max(map(l1_distance, zip(*new_rows), zip(*rows)))
+        rows = new_rows
+        trace.record(residual)
+        if residual < tolerance:
+            break
+    return [list(ranks) for ranks in zip(*rows)], trace.entries
+
+
+def extrapolated_iteration(graph, damping_factor, tolerance, max_iterations,
+                           ranks, extrapolate, history):
+    """
+    Runs power iteration, calling `extrapolate` on the last `history`
+    iterates every EXTRAPOLATION_PERIOD iterations. An extrapolation is
+    kept only if the iteration from it changes the ranks by less than the
+    iteration before it did; otherwise iteration resumes from the iterate
+    it replaced, and the wait before the next attempt doubles.
+    """
+    problem = Problem(graph, damping_factor)
+    rank = problem.start(ranks)
+    iterates = [rank]
+    period = EXTRAPOLATION_PERIOD
+    due = period
+    trial = None
+    trace = Trace()
+    while len(trace) < max_iterations:
+        new_rank = problem.step(rank)
+        residual = l1_distance(new_rank, rank)
+        trace.record(residual)
+
+        if trial is not None:
+            replaced, replaced_residual = trial
+            trial = None
+            if residual >= replaced_residual:
+                rank = replaced
+                period *= 2
+                due = len(trace) + period
+                continue
+            period = EXTRAPOLATION_PERIOD
+            iterates = [rank]
+        rank = new_rank
+        if residual < tolerance:
+            break
+
+        iterates = iterates[-(history - 1):] + [rank]
+        if len(trace) >= due and len(iterates) == history:
+            due = len(trace) + period
+            extrapolated = extrapolate(*iterates)
+            if extrapolated is not None:
+                trial = (rank, residual)
+                rank = normalize(extrapolated)
+
+    if trial is not None:
+        rank = trial[0]
+    return rank, trace.entries
+
+
+def aitken(x0, x1, x2):
+    """
+    Returns the componentwise Aitken delta-squared extrapolation of
+    three successive iterates.
+    """
+    result = []
+    for a, b, c in zip(x0, x1, x2):
+        denominator = c - 2 * b + a
+        if abs(denominator) < 1e-15:
+            result.append(c)
+        else:
+            result.append(a - (b - a) ** 2 / denominator)
+    return result
+
+
+def quadratic(x0, x1, x2, x3):
+    """
+    Returns the quadratic extrapolation of four successive iterates, or
+    None if the iterates do not determine one.
+    """
+    y1 = list(map(sub, x1, x0))
+    y2 = list(map(sub, x2, x0))
+    y3 = list(map(sub, x3, x0))
+
+    # Least squares solution of [y1 y2] (g1, g2) = -y3
+    a11 = dot(y1, y1)
+    a12 = dot(y1, y2)
+    a22 = dot(y2, y2)
+    b1 = -dot(y1, y3)
+    b2 = -dot(y2, y3)
+    determinant = a11 * a22 - a12 * a12
+    if abs(determinant) < 1e-300:
+        return None
+    g1 = (b1 * a22 - b2 * a12) / determinant
+    g2 = (a11 * b2 - a12 * b1) / determinant
+    g3 = 1.0
+
+    beta0 = g1 + g2 + g3
+    beta1 = g2 + g3
+    beta2 = g3
+    return [
+        beta0 * a + beta1 * b + beta2 * c for a, b, c in zip(x1, x2, x3)
+    ]
+
+
+def dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def normalize(rank):
+    """
+    Returns `rank` with negative values clipped and scaled to sum to 1.
+    """
+    rank = [max(r, 0.0) for r in rank]
+    total = sum(rank)
+    return [r / total for r in rank]
+
+
+def l1_distance(a, b):
+    return sum(map(abs, map(sub, a, b)))
+
+
+class Trace():
+    """
+    Records the residual and elapsed time after each iteration.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, residual):
+        self.entries.append({
+            "residual": residual,
+            "seconds": time.perf_counter() - self.start
+        })
+
+
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken_extrapolation,
+    "quadratic": quadratic_extrapolation,
+    "adaptive": adaptive_iteration
+}
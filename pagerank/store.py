@@ -0,0 +1,189 @@
+import bisect
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+from linkgraph import LinkGraph
+
+# File in the corpus directory holding the saved graph and ranks
+STORE = ".pagerank-store"
+MAGIC = b"PRSTORE1"
+
+
+def write_store(path, graph, ranks, **metadata):
+    """
+    Writes `graph` and `ranks`, a dictionary mapping a method name such
+    as "iteration" to a sequence of PageRank values by page index, to a
+    store file at `path` that `RankStore` can memory-map. Any `metadata`
+    keyword arguments are saved alongside.
+    """
+    encoded = [page.encode("utf-8") for page in graph.pages]
+    name_offsets = array("q", [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    by_name = array("i", sorted(
+        range(len(encoded)), key=encoded.__getitem__
+    ))
+
+    arrays = {
+        "names": encoded,
+        "name_offsets": name_offsets,
+        "by_name": by_name,
+        "out_offsets": graph.out_offsets,
+        "out_links": graph.out_links,
+        "in_offsets": graph.in_offsets,
+        "in_links": graph.in_links
+    }
+    for method, values in ranks.items():
+        values = array("d", values)
+        arrays[f"rank:{method}"] = values
+        arrays[f"order:{method}"] = array("i", sorted(
+            range(len(values)), key=lambda page: (-values[page], page)
+        ))
+
+    # Arrays follow the header, each starting on an 8-byte boundary
+    header = {
+        "byteorder": sys.byteorder,
+        "methods": list(ranks),
+        "metadata": metadata,
+        "arrays": {}
+    }
+    offset = 0
+    for name, data in arrays.items():
+        if name == "names":
+            nbytes, typecode = sum(map(len, data)), "B"
+        else:
+            nbytes, typecode = len(data) * data.itemsize, data.typecode
+        header["arrays"][name] = (offset, nbytes, typecode)
+        offset += nbytes + (-nbytes % 8)
+    encoded_header = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+    padding = -(len(MAGIC) + 8 + len(encoded_header)) % 8
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(encoded_header) + padding))
+        f.write(encoded_header)
+        f.write(bytes(padding))
+        for name, data in arrays.items():
+            if name == "names":
+                for chunk in data:
+                    f.write(chunk)
+            else:
+                f.write(data)
+            f.write(bytes(-f.tell() % 8))
+    os.replace(temporary, path)
+
+
+class RankStore():
+    """
+    Read-only view of a store written by `write_store`, with its arrays
+    memory-mapped so that lookups do not load the whole store.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a PageRank store")
+            try:
+                length, = struct.unpack("<Q", f.read(8))
+                header = pickle.loads(f.read(length))
+            except (struct.error, EOFError, IndexError,
+                    pickle.UnpicklingError) as e:
+                raise ValueError(f"{path} has a corrupt header") from e
+            if not isinstance(header, dict) or not {
+                "byteorder", "arrays", "methods", "metadata"
+            } <= header.keys():
+                raise ValueError(f"{path} has a corrupt header")
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} was written on another platform")
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        start = len(MAGIC) + 8 + length
+        self.arrays = {}
+        for name, (offset, nbytes, typecode) in header["arrays"].items():
+            if start + offset + nbytes > len(data):
+                raise ValueError(f"{path} is truncated")
+            self.arrays[name] = data[
+                start + offset:start + offset + nbytes
+            ].cast(typecode)
+        self.methods = header["methods"]
+        self.metadata = header["metadata"]
+
+    def __len__(self):
+        return len(self.arrays["name_offsets"]) - 1
+
+    def page(self, index):
+        """
+        Returns the name of the page at `index`.
+        """
+        offsets = self.arrays["name_offsets"]
+        return bytes(
+            self.arrays["names"][offsets[index]:offsets[index + 1]]
+        ).decode("utf-8")
+
+    def find(self, page):
+        """
+        Returns the index of `page`, or None if it is not in the store.
+        """
+        by_name = self.arrays["by_name"]
+        names = SortedNames(self)
+        position = bisect.bisect_left(names, page)
+        if position < len(names) and names[position] == page:
+            return by_name[position]
+        return None
+
+    def rank(self, page, method="iteration"):
+        """
+        Returns the PageRank of `page` by `method`, or None if the page
+        is not in the store.
+        """
+        index = self.find(page)
+        if index is None:
+            return None
+        return self.arrays[f"rank:{method}"][index]
+
+    def top(self, k, method="iteration"):
+        """
+        Returns the `k` highest ranked (page, rank) pairs by `method`.
+        """
+        ranks = self.arrays[f"rank:{method}"]
+        return [
+            (self.page(index), ranks[index])
+            for index in self.arrays[f"order:{method}"][:k]
+        ]
+
+    def ranks(self, method="iteration"):
+        """
+        Returns a dictionary mapping every page to its rank by `method`.
+        """
+        ranks = self.arrays[f"rank:{method}"]
+        return {self.page(i): ranks[i] for i in range(len(self))}
+
+    def graph(self):
+        """
+        Returns the stored LinkGraph, with its link arrays memory-mapped.
+        """
+        return LinkGraph(
+            [self.page(i) for i in range(len(self))],
+            self.arrays["out_offsets"], self.arrays["out_links"],
+            self.arrays["in_offsets"], self.arrays["in_links"]
+        )
+
+
+class SortedNames():
+    """
+    Sequence of a store's page names in sorted order, for bisecting.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, position):
+        return self.store.page(self.store.arrays["by_name"][position])
@@ -0,0 +1,56 @@
+import os
+import pickle
+
+# File in the corpus directory holding the prebuilt index
+INDEX = ".questions-index"
+
+# Bumped whenever the layout of the saved index changes
+VERSION = 2
+
+
+def corpus_files(directory):
+    """
+    Returns a dictionary mapping the name of each `.txt` file in
+    `directory` to its size and modification time, in sorted order.
+    """
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            stat = os.stat(os.path.join(directory, name))
+            files[name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def save_index(path, index):
+    """
+    Writes `index`, a dictionary built by `questions.build_index`, to
+    `path`, replacing any previous index at once.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        pickle.dump({"version": VERSION, "index": index}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load_index(path, directory=None, fast=None):
+    """
+    Returns the index saved at `path`, or None if there is none, it
+    cannot be read or was written by another version. If `directory` is
+    given, the index is also ignored when files there have been added,
+    removed or modified since it was built, and if `fast` is given, when
+    it was built with the other tokenizer.
+    """
+    try:
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    if not isinstance(saved, dict) or saved.get("version") != VERSION:
+        return None
+    index = saved["index"]
+    if directory is not None and index["files"] != corpus_files(directory):
+        return None
+    if fast is not None and index["fast"] != fast:
+        return None
+    return index
@@ -0,0 +1,135 @@
+import heapq
+import math
+from array import array
+
+
+class InvertedIndex():
+    """
+    Inverted index over a dictionary mapping document names to lists of
+    words, so that queries only touch documents containing their terms.
+
+    Documents are numbered in the order given. `postings[word]` lists a
+    (document number, positions) pair for each document the word occurs
+    in, by document number, where positions are the word's indexes in
+    that document's list; the term frequency is the number of positions.
+    """
+
+    def __init__(self, documents):
+        self.names = list(documents)
+        self.lengths = array("i")
+        self.postings = {}
+        for number, words in enumerate(documents.values()):
+            self.lengths.append(len(words))
+            positions = {}
+            for position, word in enumerate(words):
+                if word in positions:
+                    positions[word].append(position)
+                else:
+                    positions[word] = array("i", [position])
+            for word, found in positions.items():
+                if word in self.postings:
+                    self.postings[word].append((number, found))
+                else:
+                    self.postings[word] = [(number, found)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def document_frequency(self, word):
+        """
+        Returns the number of documents that contain `word`.
+        """
+        return len(self.postings.get(word, ()))
+
+    def top_files(self, query, idfs, n):
+        """
+        Returns the names of the `n` documents with the highest sum of
+        term frequency times IDF over the words in `query`, leaving out
+        documents that score 0. Ties keep document order.
+        """
+        scores = {}
+        for word in query:
+            for number, positions in self.postings.get(word, ()):
+                score = len(positions) * idfs[word]
+                scores[number] = scores.get(number, 0) + score
+        scored = [
+            (number, score) for number, score in scores.items() if score != 0
+        ]
+        return self.top(scored, n)
+
+    def top_sentences(self, query, idfs, n):
+        """
+        Returns the names of the `n` documents with the highest sum of
+        IDF over the words in `query` they contain, breaking ties by the
+        fraction of their words that are query words, then by document
+        order. Documents that score 0 are left out.
+        """
+        return self.top(self.scored_sentences(query, idfs), n)
+
+    def scored_sentences(self, query, idfs):
+        """
+        Returns (document number, (IDF score, query term density)) pairs,
+        as ranked by `top_sentences`, for the documents that score above 0.
+        """
+        scores = {}
+        matches = {}
+        for word in query:
+            for number, positions in self.postings.get(word, ()):
+                scores[number] = scores.get(number, 0) + idfs[word]
+                matches[number] = matches.get(number, 0) + len(positions)
+        return [
+            (number, (score, matches[number] / self.lengths[number]))
+            for number, score in scores.items() if score != 0
+        ]
+
+    def top(self, scored, n):
+        """
+        Returns the names of the `n` highest scoring documents from
+        (document number, score) pairs, ties going to lower numbers.
+        """
+        best = heapq.nlargest(
+            n, scored, key=lambda item: (item[1], -item[0])
+        )
+        return [self.names[number] for number, _ in best]
+
+
+def idfs_across(indexes, words):
+    """
+    Returns the IDF of each of `words` that occurs in the documents of
+    `indexes`, a list of InvertedIndex, taken together as one corpus in
+    which documents with the same name count once.
+    """
+    if len(indexes) == 1:
+        total = len(indexes[0])
+    else:
+        total = len(set().union(*(index.names for index in indexes)))
+    idfs = {}
+    for word in words:
+        names = {
+            index.names[number]
+            for index in indexes
+            for number, _ in index.postings.get(word, ())
+        }
+        if names:
+            idfs[word] = math.log(total / len(names))
+    return idfs
+
+
+def top_sentences_across(indexes, query, idfs, n):
+    """
+    Returns `InvertedIndex.top_sentences` over the documents of `indexes`
+    taken together, in order, with documents that have the same name
+    ranked once, at the position where they first appear.
+    """
+    candidates = {}
+    offset = 0
+    for index in indexes:
+        for number, score in index.scored_sentences(query, idfs):
+            name = index.names[number]
+            if name not in candidates:
+                candidates[name] = (offset + number, score)
+        offset += len(index)
+    best = heapq.nlargest(
+        n, candidates.items(), key=lambda item: (item[1][1], -item[1][0])
+    )
+    return [name for name, _ in best]
@@ -1,10 +1,18 @@
 import nltk
-from nltk.tokenize import word_tokenize
-import sys
+import argparse
+import io
+import json
 import os
-import string
+import sys
 import math
-from nltk.corpus import stopwords
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from indexstore import INDEX, corpus_files, load_index, save_index
+from invertedindex import InvertedIndex, idfs_across, top_sentences_across
+from tokenizer import tokenize_all, tokenize_words
+
 FILE_MATCHES = 1
 SENTENCE_MATCHES = 1
 
@@ -12,39 +20,179 @@ SENTENCE_MATCHES = 1
 def main():
 
     # Check command-line arguments
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python questions.py corpus")
-
-    # Calculate IDF values across files
-    files = load_files(sys.argv[1])
-    file_words = {
-        filename: tokenize(files[filename])
-        for filename in files
-    }
-    file_idfs = compute_idfs(file_words)
+    parser = argparse.ArgumentParser(
+        description="Answer a question from a corpus of text files."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--fast", action="store_true",
+                        help="split words with a regular expression "
+                             "instead of NLTK's tokenizer")
+    parser.add_argument("--processes", type=int,
+                        help="worker processes for tokenizing the corpus "
+                             "(default one per CPU)")
+    parser.add_argument("--index", metavar="PATH",
+                        help=f"prebuilt index file (default {INDEX} in "
+                             "the corpus)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="neither read nor write the prebuilt index")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--build", action="store_true",
+                      help="build the index and exit")
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer each line of FILE ('-' for stdin) as a "
+                           "question, writing JSON lines")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer questions over HTTP on localhost")
+    args = parser.parse_args()
+    if args.build and args.no_index:
+        parser.error("--build cannot be combined with --no-index")
+    index_path = args.index or os.path.join(args.corpus, INDEX)
+
+    # Calculate IDF values across files, or load them with the index
+    if args.no_index:
+        index = build_index(args.corpus, args.fast, args.processes)
+    else:
+        index = None if args.build else load_index(
+            index_path, args.corpus, args.fast
+        )
+        if index is None:
+            print("Building index...", file=sys.stderr)
+            index = build_index(args.corpus, args.fast, args.processes)
+            save_index(index_path, index)
+    if args.build:
+        print(f"Indexed {len(index['files'])} files to {index_path}")
+        return
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(index, sys.stdin, sys.stdout)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(index, f, sys.stdout)
+        return
+    if args.serve:
+        serve(index, args.serve)
+        return
 
     # Prompt user for query
-    query = set(tokenize(input("Query: ")))
+    for match in answer_question(index, input("Query: "))["sentences"]:
+        print(match)
 
-    # Determine top file matches according to TF-IDF
-    filenames = top_files(query, file_words, file_idfs, n=FILE_MATCHES)
 
-    # Extract sentences from top files
-    sentences = dict()
-    for filename in filenames:
-        for passage in files[filename].split("\n"):
-            for sentence in nltk.sent_tokenize(passage):
-                tokens = tokenize(sentence)
-                if tokens:
-                    sentences[sentence] = tokens
+def build_index(directory, fast=False, processes=None):
+    """
+    Loads and tokenizes every file in `directory`, splits the files into
+    sentences and tokenizes those too, across a pool of `processes` worker
+    processes for large corpora. Returns a dictionary with the files'
+    sizes and modification times, their IDF values, an InvertedIndex of
+    their words, and an InvertedIndex of the sentences of each file.
+    """
+    # Stamp the files before reading them, so that one edited meanwhile
+    # no longer matches the index and is read again next time
+    stamps = corpus_files(directory)
+    files = load_files(directory)
+    file_words = tokenize_all(files, fast, processes)
 
-    # Compute IDF values across sentences
-    idfs = compute_idfs(sentences)
+    passages = {}
+    for filename, contents in files.items():
+        for i, passage in enumerate(contents.split("\n")):
+            for j, sentence in enumerate(nltk.sent_tokenize(passage)):
+                passages[filename, i, j] = sentence
+    sentence_words = tokenize_all(passages, fast, processes)
+    sentences = {filename: {} for filename in files}
+    for key, sentence in passages.items():
+        if sentence_words[key]:
+            sentences[key[0]][sentence] = sentence_words[key]
+
+    return {
+        "fast": fast,
+        "files": stamps,
+        "file_idfs": compute_idfs(file_words),
+        "file_index": InvertedIndex(file_words),
+        "sentences": {
+            filename: InvertedIndex(file_sentences)
+            for filename, file_sentences in sentences.items()
+        }
+    }
+
+
+def answer_question(index, question, file_matches=FILE_MATCHES,
+                    sentence_matches=SENTENCE_MATCHES):
+    """
+    Answers `question` from an index built by `build_index`, returning a
+    dictionary of the question, the best matching files and the best
+    matching sentences from them.
+    """
+    query = set(tokenize_words(question, index["fast"]))
+
+    # Determine top file matches according to TF-IDF
+    filenames = top_files(
+        query, index["file_index"], index["file_idfs"], n=file_matches
+    )
+
+    # Compute IDF values across sentences of the top files, for the
+    # query words only, from each file's prebuilt sentence index
+    sentence_indexes = [index["sentences"][filename] for filename in filenames]
+    idfs = idfs_across(sentence_indexes, query)
 
     # Determine top sentence matches
-    matches = top_sentences(query, sentences, idfs, n=SENTENCE_MATCHES)
-    for match in matches:
-        print(match)
+    matches = top_sentences_across(
+        sentence_indexes, query, idfs, n=sentence_matches
+    )
+    return {"question": question, "files": filenames, "sentences": matches}
+
+
+def run_batch(index, lines, out):
+    """
+    Answers every non-blank line of `lines` as a question, writing one
+    JSON result per line to `out` in the same order.
+    """
+    for line in lines:
+        if line.strip():
+            out.write(json.dumps(answer_question(index, line.strip())) + "\n")
+            out.flush()
+
+
+def serve(index, port):
+    """
+    Answers questions over HTTP on localhost until interrupted, keeping
+    the index resident. GET /?q=... answers one question; POST / with a
+    body of one question per line answers each of them as JSON lines.
+    """
+
+    class QuestionHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            params = parse_qs(urlparse(self.path).query)
+            if "q" not in params:
+                self.respond(400, {"error": "q is required"})
+                return
+            self.respond(200, answer_question(index, params["q"][0]))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            out = io.StringIO()
+            run_batch(index, body.splitlines(), out)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            self.wfile.write(out.getvalue().encode("utf-8"))
+
+        def respond(self, status, result):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(result).encode("utf-8"))
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), QuestionHandler)
+    print(f"Serving on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 def load_files(directory):
@@ -54,6 +202,8 @@ def load_files(directory):
     """
     dic = {} # dictionary to store the file name and its contents
     for file in os.listdir(directory): # iterate through the files in the directory
+        if not file.endswith(".txt"): # skip other files, such as the saved index
+            continue
         with open(os.path.join(directory, file) , encoding= "utf-8") as f: # open the file usnig utf-8 encoding which is the most common encoding for text files
             dic[file] = f.read()# add the file name and its contents to the dictionary
     return dic # return the dictionary
@@ -67,12 +217,11 @@ def tokenize(document):
 
     Process document by coverting all words to lowercase, and removing any
     punctuation or English stopwords.
+
+    See `tokenizer.tokenize_words`, which checks each word against
+    preloaded sets and can use a faster regular expression tokenizer.
     """
-    lst = [] # list to store the words # tokenize the document
-    for word in word_tokenize(document): # iterate through the words
-        if word not in string.punctuation and word.lower() not in nltk.corpus.stopwords.words("english"):
-            lst.append(word.lower())
-    return lst # return the list of words
+    return tokenize_words(document)
 
 def compute_idfs(documents):
     """
@@ -82,18 +231,15 @@ def compute_idfs(documents):
     Any word that appears in at least one of the documents should be in the
     resulting dictionary.
     """
-    dic = {} # dictionary to store the words and their idf values
     total_docs = len(documents) # total number of documents
 
-    unique_words = set() # set to store the unique words in all the documents
-    unique_words = set(word for lst in documents.values() for word in lst) # iterate through the words in all the documents and add them to the set
-    for word in unique_words:
-        count = 0
-        for lst in documents.values():
-            if word in lst:
-                count += 1
-        dic[word] = math.log(total_docs / count) # calculate the idf value of the word and add it to the dictionary
-    return dic # return the dictionary
+    # Count each word once per document it appears in, in a single pass
+    counts = Counter()
+    for lst in documents.values():
+        counts.update(set(lst))
+    return {
+        word: math.log(total_docs / count) for word, count in counts.items()
+    }
 
 def top_files(query, files, idfs, n):
     """
@@ -101,18 +247,11 @@ def top_files(query, files, idfs, n):
     files to a list of their words), and `idfs` (a dictionary mapping words
     to their IDF values), return a list of the filenames of the the `n` top
     files that match the query, ranked according to tf-idf.
-    """
-    topfile  = {} #list to store the top files
-    for filename , filecontent in files.items(): # iterate through the files
-        score = 0# variable to store the score of the file
-        for word in query:  # iterate through the words in the query
-            if word in filecontent:
-                score += filecontent.count(word) * idfs[word]
-        if score != 0:
-            topfile[filename] = score
-    sortedscore = [k for k, v in sorted(topfile.items(), key=lambda x: x[1], reverse=True)]
-    return sortedscore[:n]
 
+    `files` may also be an InvertedIndex built from that dictionary, so
+    that scoring only visits files containing query words.
+    """
+    return as_index(files).top_files(query, idfs, n)
 
 
 
@@ -123,20 +262,20 @@ def top_sentences(query, sentences, idfs, n):
     to their IDF values), return a list of the `n` top sentences that match
     the query, ranked according to idf. If there are ties, preference should
     be given to sentences that have a higher query term density.
+
+    `sentences` may also be an InvertedIndex built from that dictionary.
     """
-    topsentence = {}
-    for sentence , sentencecontent in sentences.items():
-        score = 0
-        for word in query:
-            if word in sentencecontent:
-                score += idfs[word]
-        if score != 0:
-            density = sum([sentencecontent.count(word) for word in query]) / len(sentencecontent)
-            topsentence[sentence] = (score , density)
-    sortedscore = [k for k, v in sorted(topsentence.items(), key=lambda x: (x[1][0], x[1][1]), reverse=True)]
+    return as_index(sentences).top_sentences(query, idfs, n)
 
-    return sortedscore[:n]
 
+def as_index(documents):
+    """
+    Returns `documents` as an InvertedIndex, building one if it is a
+    dictionary mapping names to lists of words.
+    """
+    if isinstance(documents, InvertedIndex):
+        return documents
+    return InvertedIndex(documents)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+import functools
+import multiprocessing
+import os
+import re
+import string
+
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+# Tokens dropped as punctuation: any run of characters that occurs in
+# string.punctuation, as a substring test against it would drop
+PUNCTUATION = frozenset(
+    string.punctuation[i:j]
+    for i in range(len(string.punctuation) + 1)
+    for j in range(i, len(string.punctuation) + 1)
+)
+
+# Words, keeping inner hyphens and apostrophes, or single symbols
+WORD = re.compile(r"\w+(?:[-'’]\w+)*|[^\w\s]")
+
+# Corpora with fewer documents than this are tokenized without a pool
+PARALLEL_DOCUMENTS = 64
+
+
+@functools.lru_cache(maxsize=None)
+def stopword_set(language="english"):
+    """
+    Returns the NLTK stopwords for `language` as a frozenset, loading
+    them only once.
+    """
+    return frozenset(stopwords.words(language))
+
+
+def split_words(document, fast=False):
+    """
+    Returns the tokens of `document` from NLTK's word_tokenize, or from
+    a regular expression that is much faster but splits contractions
+    and some punctuation differently if `fast` is true.
+    """
+    if fast:
+        return WORD.findall(document)
+    return word_tokenize(document)
+
+
+def tokenize_words(document, fast=False):
+    """
+    Returns the lowercased words of `document` in order, leaving out
+    punctuation and English stopwords.
+    """
+    stop = stopword_set()
+    words = []
+    for word in split_words(document, fast):
+        if word in PUNCTUATION:
+            continue
+        word = word.lower()
+        if word not in stop:
+            words.append(word)
+    return words
+
+
+def tokenize_document(task):
+    name, document, fast = task
+    return name, tokenize_words(document, fast)
+
+
+def tokenize_all(documents, fast=False, processes=None):
+    """
+    Returns a dictionary mapping each name in `documents`, a dictionary
+    of names to strings, to its list of words from `tokenize_words`,
+    tokenizing across a pool of `processes` worker processes (one per
+    CPU if None) when there are many documents.
+    """
+    tasks = [(name, document, fast) for name, document in documents.items()]
+    if processes == 1 or len(tasks) < PARALLEL_DOCUMENTS:
+        return dict(map(tokenize_document, tasks))
+
+    # Load the stopwords before forking so workers do not each load them
+    stopword_set()
+    chunksize = max(1, len(tasks) // ((processes or os.cpu_count() or 1) * 8))
+    with multiprocessing.Pool(processes) as pool:
+        return dict(pool.imap(tokenize_document, tasks, chunksize))